@@ -0,0 +1,116 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from gobnb.decode import loads,SearchResponse,PriceResponse
+from gobnb.parse import parse_body_details
+from gobnb.price import parse_price
+from gobnb.standardize import standardize_details,standardize_search
+from gobnb.utils import get_nested_value,parse_price_symbol
+
+fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load_fixtures(path: str) -> dict:
+    with open(os.path.join(path, "room.html"), encoding="utf-8") as f:
+        room_html = f.read()
+    with open(os.path.join(path, "stays_search.json"), "rb") as f:
+        stays_search_raw = f.read()
+    with open(os.path.join(path, "stays_pdp_sections.json"), "rb") as f:
+        stays_pdp_sections_raw = f.read()
+    stays_search = json.loads(stays_search_raw)
+    stays_pdp_sections = json.loads(stays_pdp_sections_raw)
+    search_results = get_nested_value(stays_search, "data.presentation.staysSearch.results.searchResults", [])
+    details_raw, _, _ = parse_body_details(room_html)
+    return {
+        "room_html": room_html,
+        "details_raw": details_raw,
+        "search_results": search_results,
+        "stays_pdp_sections": stays_pdp_sections,
+        "stays_search_raw": stays_search_raw,
+        "stays_pdp_sections_raw": stays_pdp_sections_raw,
+    }
+
+def cases(fixtures: dict) -> list:
+    results = fixtures["search_results"]
+    listing = results[0]
+    price_strings = ["$1,234", "-$12", "MX$2,345 ", "€ 98", "no price"]
+    return [
+        ("parse_body_details", 1, lambda: parse_body_details(fixtures["room_html"])),
+        ("standardize_details", 1, lambda: standardize_details(fixtures["details_raw"])),
+        ("standardize_search", len(results), lambda: standardize_search(results)),
+        ("parse_price", 1, lambda: parse_price(fixtures["stays_pdp_sections"])),
+        ("decode_search", 1, lambda: loads(fixtures["stays_search_raw"], SearchResponse)),
+        ("decode_price", 1, lambda: loads(fixtures["stays_pdp_sections_raw"], PriceResponse)),
+        ("get_nested_value", 1, lambda: get_nested_value(listing, "pricingQuote.structuredStayDisplayPrice.primaryLine.price", "")),
+        ("parse_price_symbol", len(price_strings), lambda: [parse_price_symbol(price) for price in price_strings]),
+    ]
+
+def measure(fn, min_time: float) -> dict:
+    fn()
+    rounds = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        fn()
+        rounds += 1
+        elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds_per_call": elapsed / rounds, "rounds": rounds, "peak_bytes": peak - before}
+
+def run(path: str = fixtures_dir, min_time: float = 1.0, only: list = None) -> dict:
+    fixtures = load_fixtures(path)
+    report = {}
+    for name, items, fn in cases(fixtures):
+        if only and name not in only:
+            continue
+        stats = measure(fn, min_time)
+        stats["items_per_call"] = items
+        stats["items_per_second"] = items / stats["seconds_per_call"]
+        report[name] = stats
+    return report
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, stats in report.items():
+        if name not in baseline:
+            continue
+        ratio = stats["seconds_per_call"] / baseline[name]["seconds_per_call"]
+        if ratio > 1 + tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="offline benchmarks for the parse and standardize hot paths")
+    parser.add_argument("--fixtures", default=fixtures_dir, help="directory with room.html, stays_search.json and stays_pdp_sections.json")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to run each case")
+    parser.add_argument("--only", nargs="*", help="run only these cases")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="report from a previous run, exit with 1 if a case got slower than the tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline, 0.2 is 20%%")
+    args = parser.parse_args()
+    report = run(args.fixtures, args.min_time, args.only)
+    print(f"{'case':<22}{'per call':>14}{'items/s':>14}{'peak alloc':>14}{'rounds':>10}")
+    for name, stats in report.items():
+        print(f"{name:<22}{stats['seconds_per_call']*1e6:>11.1f} us{stats['items_per_second']:>14.0f}{stats['peak_bytes']/1024:>11.1f} KB{stats['rounds']:>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for name, ratio in regressions:
+            print(f"regression: {name} is {ratio:.2f}x slower than the baseline")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
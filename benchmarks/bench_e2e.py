@@ -0,0 +1,137 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import gobnb
+import gobnb.aio
+import gobnb.api as api
+from gobnb.client import Client
+from gobnb.ratelimit import RateController
+from mock_server import run as run_server,fixtures_dir
+
+check_in, check_out = "2024-11-02", "2024-11-10"
+date_ranges = [(f"2024-11-{day:02d}", f"2024-11-{day + 2:02d}") for day in range(1, 21)]
+
+class LocalClient(Client):
+    # sends the requests for www.airbnb.com to the mock server
+    def __init__(self, base: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base = base
+
+    def request(self, method: str, url: str, proxy_url: str = "", **kwargs):
+        return super().request(method, url.replace("https://www.airbnb.com", self.base, 1), proxy_url, **kwargs)
+
+    async def async_request(self, method: str, url: str, proxy_url: str = "", **kwargs):
+        return await super().async_request(method, url.replace("https://www.airbnb.com", self.base, 1), proxy_url, **kwargs)
+
+def serve(config: dict, queue):
+    run_server(config, ready=queue.put)
+
+def start_server(config: dict):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(config, queue), daemon=True)
+    process.start()
+    port = queue.get(timeout=30)
+    return process, f"http://127.0.0.1:{port}"
+
+def threaded(fn, room_ids: list, concurrency: int) -> int:
+    def run(room_id):
+        try:
+            fn(room_id)
+            return 0
+        except Exception:
+            return 1
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return sum(executor.map(run, room_ids))
+
+def cases(client: Client, room_ids: list, concurrency: int) -> list:
+    async def get_many():
+        errors = 0
+        async for _, _, error in gobnb.aio.get_many(room_ids, "USD", check_in, check_out, concurrency=concurrency, client=client):
+            errors += error is not None
+        return errors
+
+    def search():
+        try:
+            return len(gobnb.Search_all(check_in, check_out, 1, 1, 0, 0, 10, "USD", "", client)), 0
+        except Exception:
+            return 0, 1
+
+    return [
+        ("Get_from_room_id", lambda: (len(room_ids), threaded(lambda room_id: gobnb.Get_from_room_id(room_id, "USD", check_in, check_out, "", client), room_ids, concurrency))),
+        ("aio.get_many", lambda: (len(room_ids), asyncio.run(get_many()))),
+        ("Get_many", lambda: (len(room_ids), sum(error is not None for _, _, error in gobnb.Get_many(room_ids, "USD", check_in, check_out, "", client, fetch_workers=concurrency)))),
+        ("Get_price_by_room_id", lambda: (len(room_ids), threaded(lambda room_id: gobnb.Get_price_by_room_id(room_id, "USD", check_in, check_out, "", client), room_ids, concurrency))),
+        ("Get_price_calendar", lambda: (len(date_ranges), sum(row["error"] != "" for row in gobnb.Get_price_calendar(room_ids[0], "USD", date_ranges, "", client, concurrency=concurrency)["prices"]))),
+        ("Search_all", search),
+    ]
+
+def new_client(base: str, concurrency: int, adaptive: bool) -> LocalClient:
+    rate = RateController(rate=10000, burst=concurrency * 2, concurrency=concurrency, max_concurrency=concurrency * 4) if adaptive else None
+    return LocalClient(base, max_clients=concurrency, rate=rate)
+
+def run(base: str, rooms: int, concurrency: int, adaptive: bool = False, only: list = None) -> dict:
+    room_ids = list(range(10_000_000, 10_000_000 + rooms))
+    report = {}
+    names = [name for name, _ in cases(None, room_ids, concurrency)]
+    for index, name in enumerate(names):
+        if only and name not in only:
+            continue
+        # every case starts with a new client (and rate controller) and without the api key
+        client = new_client(base, concurrency, adaptive)
+        _, fn = cases(client, room_ids, concurrency)[index]
+        api.invalidate()
+        try:
+            start = time.perf_counter()
+            items, errors = fn()
+            seconds = time.perf_counter() - start
+            # a second run on the same client has to reuse the sessions of the first one
+            sessions = client.session_count()
+            fn()
+            leaked = client.session_count() - sessions
+        finally:
+            client.close()
+        report[name] = {"seconds": seconds, "items": items, "errors": errors, "items_per_second": items / seconds, "leaked_sessions": leaked}
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="end to end rooms/sec of the public functions against the local mock server")
+    parser.add_argument("--fixtures", default=fixtures_dir, help="directory with room.html, stays_search.json and stays_pdp_sections.json")
+    parser.add_argument("--rooms", type=int, default=200, help="rooms requested by every case")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pages", type=int, default=5, help="search pages served")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    parser.add_argument("--padding", type=int, default=0, help="bytes added to every response body")
+    parser.add_argument("--adaptive", action="store_true", help="use a RateController so 429/503 are retried")
+    parser.add_argument("--only", nargs="*", help="run only these cases")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+    config = {
+        "path": args.fixtures, "pages": args.pages, "latency": args.latency, "jitter": args.jitter,
+        "error_rate": args.error_rate, "throttle_rate": args.throttle_rate, "retry_after": args.retry_after, "padding": args.padding,
+    }
+    process, base = start_server(config)
+    try:
+        report = run(base, args.rooms, args.concurrency, args.adaptive, args.only)
+    finally:
+        process.terminate()
+    print(f"{'case':<22}{'seconds':>10}{'items':>8}{'errors':>8}{'items/s':>10}{'leaked':>8}")
+    for name, stats in report.items():
+        print(f"{name:<22}{stats['seconds']:>10.2f}{stats['items']:>8}{stats['errors']:>8}{stats['items_per_second']:>10.1f}{stats['leaked_sessions']:>8}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if any(stats["leaked_sessions"] for stats in report.values()):
+        sys.exit(1)
+    if any(stats["errors"] for stats in report.values()) and not (args.error_rate or args.throttle_rate):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+import gc
+import argparse
+import tracemalloc
+from gobnb.compact import CompactDetails
+from gobnb.parse import parse_body_details_wrapper
+
+fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def retained(build, count: int) -> int:
+    # bytes still allocated after building count records and collecting the garbage
+    gc.collect()
+    tracemalloc.start()
+    records = [build(i) for i in range(count)]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description="memory held by standardize_details dicts and by CompactDetails records")
+    parser.add_argument("--fixtures", default=fixtures_dir, help="directory with room.html")
+    parser.add_argument("--listings", type=int, default=10000)
+    args = parser.parse_args()
+    with open(os.path.join(args.fixtures, "room.html"), encoding="utf-8") as f:
+        room_html = f.read()
+    # every listing gets its own image folder, as on airbnb
+    marker = "Hosting-668146487515150072"
+    pages = [room_html.replace(marker, f"Hosting-{i}") for i in range(64)]
+
+    def details(i):
+        data, _ = parse_body_details_wrapper(pages[i % len(pages)].replace("Hosting-", f"Hosting-{i // len(pages)}-"))
+        return data
+
+    dicts = retained(details, args.listings)
+    compact = retained(lambda i: CompactDetails.from_dict(details(i)), args.listings)
+    per_10k = 10000 / args.listings
+    print(f"{'representation':<18}{'MB per 10k listings':>22}")
+    print(f"{'dict':<18}{dicts * per_10k / 2**20:>22.1f}")
+    print(f"{'CompactDetails':<18}{compact * per_10k / 2**20:>22.1f}")
+    print(f"saved {(dicts - compact) * per_10k / 2**20:.1f} MB per 10k listings ({1 - compact / dicts:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import json
+import time
+from bs4 import BeautifulSoup
+from gobnb.parse import parse_body_details,extract_deferred_state
+from gobnb.utils import remove_space
+
+def build_body(sections: int = 400) -> str:
+    state = {
+        "niobeMinimalClientData": [["StaysPdpSections", {
+            "variables": {"id": "U3RheUxpc3Rpbmc6MQ==", "pdpSectionsRequest": {"p3ImpressionId": "p3_1_bench"}},
+            "data": {"presentation": {"stayProductDetailPage": {"sections": {"sections": [
+                {"sectionId": f"SECTION_{i}", "section": {"__typename": "AmenitiesSection", "title": "Amenity " * 20, "items": list(range(50))}}
+                for i in range(sections)
+            ]}}}},
+        }]],
+    }
+    head = '<script>window.config={"language":"en","api_config":{"key":"d306zoyjsyarp7ifhu67rjxn52tv0t20"}}</script>'
+    noise = "".join(f'<div class="c{i}"><span>listing {i}</span><a href="/rooms/{i}">link</a></div>' for i in range(3000))
+    return (f"<html><head>{head}</head><body>{noise}"
+            f'<script id="data-deferred-state-0" data-deferred-state-0="true" type="application/json">{json.dumps(state)}</script>'
+            f"{noise}</body></html>")
+
+def soup_extract(body: str):
+    soup = BeautifulSoup(body, 'html.parser')
+    return json.loads(remove_space(soup.select("#data-deferred-state-0")[0].getText()))
+
+def timeit(fn, body: str, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(body)
+    return (time.perf_counter() - start) / rounds
+
+def main():
+    body = build_body()
+    assert extract_deferred_state(body) == soup_extract(body)
+    rounds = 20
+    fast = timeit(extract_deferred_state, body, rounds)
+    soup = timeit(soup_extract, body, rounds)
+    full = timeit(parse_body_details, body, rounds)
+    print(f"body size:               {len(body)/1024:.0f} KB")
+    print(f"beautifulsoup extract:   {soup*1000:.2f} ms")
+    print(f"fast extract:            {fast*1000:.2f} ms")
+    print(f"parse_body_details:      {full*1000:.2f} ms")
+    print(f"speedup:                 {soup/fast:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import json
+import random
+import asyncio
+import argparse
+from datetime import date,timedelta
+from urllib.parse import urlsplit
+
+fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+class MockAirbnb:
+    # stand-in for www.airbnb.com serving the recorded fixtures: the homepage and /rooms/<id> get the room page
+    # (with api_config.key and #data-deferred-state-0), StaysSearch returns `pages` pages linked by nextPageCursor,
+    # StaysPdpSections the recorded price and PdpAvailabilityCalendar a year of bookable days, every response waits latency (+- jitter) seconds,
+    # error_rate of them are 503, throttle_rate are 429 with Retry-After and padding adds bytes to every body
+    def __init__(self, path: str = fixtures_dir, pages: int = 5, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: float = 1, padding: int = 0):
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.requests = {}
+        with open(os.path.join(path, "room.html"), "rb") as f:
+            self.room_page = f.read() + f"<!--{'x' * padding}-->".encode()
+        with open(os.path.join(path, "stays_pdp_sections.json"), "rb") as f:
+            price = json.load(f)
+        price["padding"] = "x" * padding
+        self.price = json.dumps(price).encode()
+        with open(os.path.join(path, "stays_search.json"), "rb") as f:
+            search = json.load(f)
+        self.search_pages = [self._search_page(search, page, padding) for page in range(pages)]
+        self.calendar = self._calendar()
+
+    def _search_page(self, search: dict, page: int, padding: int) -> bytes:
+        results = search["data"]["presentation"]["staysSearch"]["results"]
+        listings = results["searchResults"]
+        for i, listing in enumerate(listings):
+            if "listing" in listing:
+                # unique room ids across pages
+                listing["listing"]["id"] = str(10_000_000 + page * len(listings) + i)
+        results["paginationInfo"]["nextPageCursor"] = f"page-{page+1}" if page + 1 < self.pages else None
+        results["paginationInfo"]["pageCursors"] = [f"page-{index}" for index in range(self.pages)]
+        search["padding"] = "x" * padding
+        return json.dumps(search).encode()
+
+    def _calendar(self) -> bytes:
+        # every day bookable for one to 365 nights, for 12 months from today
+        start = date.today().replace(day=1)
+        days = [{"calendarDate": (start + timedelta(days=offset)).isoformat(), "available": True, "availableForCheckin": True,
+                 "availableForCheckout": True, "minNights": 1, "maxNights": 365} for offset in range(366)]
+        return json.dumps({"data": {"merlin": {"pdpAvailabilityCalendar": {"calendarMonths": [{"days": days}]}}}}).encode()
+
+    def route(self, method: str, target: str, body: bytes) -> tuple:
+        path = urlsplit(target).path
+        if path.startswith("/api/v3/StaysSearch/") and method == "POST":
+            cursor = json.loads(body)["variables"]["staysSearchRequest"]["cursor"] or "page-0"
+            page = int(cursor.split("-")[1]) if cursor.startswith("page-") else self.pages
+            if page >= self.pages:
+                return "search", 400, "application/json", b'{"errors":["bad cursor"]}'
+            return "search", 200, "application/json", self.search_pages[page]
+        if path.startswith("/api/v3/StaysPdpSections/"):
+            return "price", 200, "application/json", self.price
+        if path.startswith("/api/v3/PdpAvailabilityCalendar/"):
+            return "calendar", 200, "application/json", self.calendar
+        if path == "/" or path.startswith("/rooms/"):
+            return "room" if path != "/" else "homepage", 200, "text/html; charset=utf-8", self.room_page
+        return "unknown", 404, "text/plain", b"not found"
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                kind, status, content_type, payload = self.route(method, target, body)
+                self.requests[kind] = self.requests.get(kind, 0) + 1
+                extra = ""
+                draw = random.random()
+                if draw < self.throttle_rate:
+                    status, content_type, payload = 429, "application/json", b'{"error":"too many requests"}'
+                    extra = f"Retry-After: {self.retry_after}\r\n"
+                elif draw < self.throttle_rate + self.error_rate:
+                    status, content_type, payload = 503, "application/json", b'{"error":"unavailable"}'
+                delay = self.latency + random.uniform(-self.jitter, self.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                close = headers.get("connection", "").lower() == "close"
+                writer.write((
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'ERROR'}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Set-Cookie: bev=mock; Path=/\r\n"
+                    f"{extra}"
+                    f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+                ).encode("latin-1") + payload)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0, ready=None):
+        server = await asyncio.start_server(self.handle, host, port)
+        port = server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready(port)
+        async with server:
+            await server.serve_forever()
+
+def run(config: dict, host: str = "127.0.0.1", port: int = 0, ready=None):
+    asyncio.run(MockAirbnb(**config).serve(host, port, ready))
+
+def main():
+    parser = argparse.ArgumentParser(description="local stand-in for airbnb serving the recorded fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fixtures", default=fixtures_dir)
+    parser.add_argument("--pages", type=int, default=5, help="search pages before nextPageCursor is null")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +- seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After of the 429 responses")
+    parser.add_argument("--padding", type=int, default=0, help="bytes added to every response body")
+    args = parser.parse_args()
+    config = {
+        "path": args.fixtures, "pages": args.pages, "latency": args.latency, "jitter": args.jitter,
+        "error_rate": args.error_rate, "throttle_rate": args.throttle_rate, "retry_after": args.retry_after, "padding": args.padding,
+    }
+    run(config, args.host, args.port, lambda port: print(f"serving on http://{args.host}:{port}", flush=True))
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,14 @@
-from gobnb.search import Search_all,Search_first_page
-from gobnb.details import Get_from_room_url,Get_from_room_id,Get_from_room_id_and_domain,Get_price_by_url
-from gobnb.utils import parse_proxy
\ No newline at end of file
+from gobnb.search import Search_all,Search_all_tiled,Search_batch,Search_all_columns,Search_iter,Search_first_page
+from gobnb.details import Get_from_room_url,Get_from_room_id,Get_from_room_id_and_domain,Get_price_by_url,Get_price_by_room_id,Get_price_calendar
+from gobnb.utils import parse_proxy
+from gobnb.client import Client
+from gobnb.cache import ResponseCache,CacheMiss
+from gobnb.columnar import SearchColumns
+from gobnb.incremental import Crawl_incremental
+from gobnb.proxies import ProxyPool
+from gobnb.ratelimit import RateController
+from gobnb.metrics import Stats,add_hook,remove_hook
+from gobnb.pipeline import Get_many
+from gobnb.store import ListingStore
+from gobnb.compact import CompactDetails
+from gobnb.availability import Get_availability
\ No newline at end of file
@@ -0,0 +1,176 @@
+import asyncio
+from datetime import date
+import gobnb.api as api
+from gobnb.proxies import sticky
+from gobnb.client import Client
+from gobnb.metrics import instrument,record_response
+from gobnb.decode import loads,SearchResponse,PriceResponse
+from gobnb.details import headers
+from gobnb.parse import parse_body_details_wrapper
+from curl_cffi.requests.exceptions import HTTPError
+from gobnb.price import build_request,parse_price,section_ids_for,price_section_ids,product_id_for,impression_id_for,impression_ids,is_rejected
+from gobnb.standardize import get_nested_value,standardize_search,check_fields
+import gobnb.availability as availability
+import gobnb.search as search
+
+async def get_many(room_ids: list, currency: str, check_in: str, check_out: str, proxy_url: str = "", concurrency: int = 10, client: Client = None, fields: list = None):
+    own_client = client is None
+    if own_client:
+        client = Client(max_clients=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(room_id):
+        async with semaphore:
+            try:
+                data = await get_from_room_id(room_id, currency, check_in, check_out, proxy_url, client, fields)
+                return room_id, data, None
+            except Exception as e:
+                return room_id, None, e
+
+    tasks = [asyncio.ensure_future(run(room_id)) for room_id in room_ids]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+        if own_client:
+            await client.aclose()
+
+async def get_price_calendar(room_id: int, currency: str, date_ranges: list, proxy_url: str = "", client: Client = None, adults: list = None, concurrency: int = 8, fields: list = None, check_availability: bool = True):
+    own_client = client is None
+    if own_client:
+        client = Client(max_clients=concurrency)
+    if not adults:
+        adults = [1]
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        room_url = f"https://www.airbnb.com/rooms/{room_id}"
+        room_page = get_from_room_url(room_url, proxy_url, client, fields)
+        if check_availability:
+            (data, price_input, cookies), calendar = await asyncio.gather(room_page, availability_for(room_id, date_ranges, proxy_url, client, currency))
+        else:
+            (data, price_input, cookies), calendar = await room_page, {}
+        section_ids = section_ids_for(fields)
+
+        async def run(check_in, check_out, guests):
+            row = {"check_in": check_in, "check_out": check_out, "adults": guests, "price": {}, "error": "", "skipped": ""}
+            if calendar:
+                row["skipped"] = availability.unavailable_reason(calendar, check_in, check_out)
+                if row["skipped"]:
+                    return row
+            async with semaphore:
+                try:
+                    row["price"] = await get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, price_input["proxy_url"], client, guests, section_ids)
+                except Exception as e:
+                    row["error"] = str(e)
+            return row
+
+        data["prices"] = await asyncio.gather(*[run(check_in, check_out, guests) for check_in, check_out in date_ranges for guests in adults])
+        return data
+    finally:
+        if own_client:
+            await client.aclose()
+
+async def get_from_room_id(room_id: int, currency: str, check_in: str, check_out: str, proxy_url: str, client: Client, fields: list = None):
+    room_url = f"https://www.airbnb.com/rooms/{room_id}"
+    data, price_input, cookies = await get_from_room_url(room_url, proxy_url, client, fields)
+    if check_in is None or check_in == "" or check_out is None or check_out == "":
+        return data
+    dataFullPrice = await get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, price_input["proxy_url"], client, section_ids=section_ids_for(fields))
+    data["price"] = dataFullPrice
+    return data
+
+async def get_price_by_room_id(room_id: int, currency: str, check_in: str, check_out: str, proxy_url: str, client: Client, adults: int = 1, calendar: dict = None):
+    if calendar and availability.unavailable_reason(calendar, check_in, check_out):
+        return {}
+    impression_id = impression_id_for(room_id)
+    api_key = await asyncio.to_thread(api.get_cached, proxy_url, client)
+    try:
+        price = await get_price(product_id_for(room_id), impression_id, api_key, currency, {}, check_in, check_out, proxy_url, client, adults, price_section_ids)
+    except HTTPError as e:
+        if not is_rejected(e):
+            raise
+        room_url = f"https://www.airbnb.com/rooms/{room_id}"
+        _, price_input, cookies = await get_from_room_url(room_url, proxy_url, client, [])
+        impression_id = price_input["impression_id"]
+        price = await get_price(price_input["product_id"],impression_id,price_input["api_key"],currency, cookies, check_in, check_out, price_input["proxy_url"], client, adults, price_section_ids)
+    # an accepted impression id is kept even without a price, {} is the answer for dates that can not be booked
+    impression_ids[str(room_id)] = impression_id
+    return price
+
+async def get_availability(room_id: int, proxy_url: str, client: Client, months: int = 12, start: str = "", currency: str = "USD") -> dict:
+    first = date.fromisoformat(start) if start else date.today()
+    api_key = await asyncio.to_thread(api.get_cached, proxy_url, client)
+    return await get_calendar(room_id, first.month, first.year, months, currency, api_key, proxy_url, client)
+
+async def availability_for(room_id: int, date_ranges: list, proxy_url: str, client: Client, currency: str = "USD") -> dict:
+    if len(date_ranges) == 0:
+        return {}
+    first, months = availability.calendar_window(date_ranges)
+    try:
+        return await get_availability(room_id, proxy_url, client, months, first, currency)
+    except Exception:
+        return {}
+
+@instrument("get_calendar")
+async def get_calendar(room_id: int, month: int, year: int, months: int, currency: str, api_key: str, proxy_url: str, client: Client) -> dict:
+    url, calendar_headers = availability.build_request(room_id, month, year, months, currency, api_key)
+    response = await client.async_get(url, proxy_url, headers=calendar_headers)
+    record_response(response)
+    if response.status_code in api.rejected_status:
+        api.invalidate(api_key)
+    response.raise_for_status()
+    return availability.parse_calendar(loads(response.content))
+
+@instrument("get_from_room_url")
+async def get_from_room_url(room_url: str, proxy_url: str, client: Client, fields: list = None):
+    check_fields(fields)
+    response = await client.async_get(room_url, proxy_url, headers=headers)
+    record_response(response)
+    response.raise_for_status()
+    data_formatted, price_dependency_input=parse_body_details_wrapper(response.text, fields)
+    api.seed(price_dependency_input["api_key"])
+    price_dependency_input["proxy_url"] = sticky(proxy_url, response)
+    cookies = response.cookies
+    return data_formatted, price_dependency_input, cookies
+
+@instrument("get_price")
+async def get_price(product_id: str, impresion_id: str, api_key: str, currency: str, cookies: list, checkIn: str, checkOut: str, proxy_url: str, client: Client, adults: int = 1, section_ids: list = None):
+    url, price_headers = build_request(product_id, impresion_id, api_key, currency, checkIn, checkOut, adults, section_ids)
+    response = await client.async_get(url, proxy_url, headers=price_headers, cookies=dict(cookies))
+    record_response(response)
+    if response.status_code in api.rejected_status:
+        api.invalidate(api_key)
+    response.raise_for_status()
+    return parse_price(loads(response.content, PriceResponse))
+
+async def search_iter(check_in: str, check_out: str, ne_lat: float, ne_long: float, sw_lat: float, sw_long: float, zoom_value: int, currency: str, proxy_url: str = "", client: Client = None):
+    own_client = client is None
+    if own_client:
+        client = Client()
+    try:
+        cursor = ""
+        while cursor is not None:
+            api_key = await asyncio.to_thread(api.get_cached, proxy_url, client)
+            results_raw = await search_page(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,cursor, currency, api_key, proxy_url, client)
+            results = standardize_search(results_raw.get("searchResults",[]))
+            for result in results:
+                yield result
+            cursor = search.next_cursor(results_raw, results)
+    finally:
+        if own_client:
+            await client.aclose()
+
+@instrument("search")
+async def search_page(check_in: str, check_out: str, ne_lat: float, ne_long: float, sw_lat: float, sw_long: float, zoom_value: int, cursor: str, currency: str, api_key: str, proxy_url: str, client: Client):
+    url, input_data, search_headers = search.build_request(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,cursor,currency,api_key)
+    response = await client.async_post(url, proxy_url, json=input_data, headers=search_headers, impersonate="chrome110")
+    if response.status_code in api.rejected_status:
+        api.invalidate(api_key)
+        search_headers["X-Airbnb-Api-Key"] = await asyncio.to_thread(api.get_cached, proxy_url, client)
+        response = await client.async_post(url, proxy_url, json=input_data, headers=search_headers, impersonate="chrome110")
+    record_response(response)
+    response.raise_for_status()
+    data = loads(response.content, SearchResponse)
+    return get_nested_value(data,"data.presentation.staysSearch.results",{})
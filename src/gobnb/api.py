@@ -1,11 +1,91 @@
-from curl_cffi import requests
 import re
+import os
+import json
+import time
+import threading
+from gobnb.client import Client,get_client
+from gobnb.metrics import instrument,record_response
 
 ep = "https://www.airbnb.com"
 
 regx_api_key = re.compile(r'"api_config":{"key":".+?"')
 
-def get(proxy_url: str) -> str:
+rejected_status = (401, 403)
+
+key_cache = {"key": "", "expires": 0.0}
+key_cache_config = {"ttl": 6 * 3600, "path": ""}
+key_lock = threading.Lock()
+fetch_lock = threading.Lock()
+
+def configure_key_cache(ttl: float = None, path: str = None):
+    with key_lock:
+        if ttl is not None:
+            key_cache_config["ttl"] = ttl
+        if path is not None:
+            key_cache_config["path"] = path
+            key_cache["key"], key_cache["expires"] = "", 0.0
+            load_key_cache()
+
+def load_key_cache():
+    path = key_cache_config["path"]
+    if not path or not os.path.exists(path):
+        return
+    try:
+        with open(path) as f:
+            stored = json.load(f)
+        key_cache["key"], key_cache["expires"] = stored["key"], float(stored["expires"])
+    except (OSError, ValueError, KeyError):
+        return
+
+def save_key_cache():
+    path = key_cache_config["path"]
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(key_cache, f)
+    os.replace(tmp_path, path)
+
+def cached_key() -> str:
+    if key_cache["key"] and key_cache["expires"] > time.time():
+        return key_cache["key"]
+    return ""
+
+def seed(api_key: str):
+    # called for every room page, the same key is only stored again (and written to disk) when it is close to expiring
+    if not api_key or not needs_seed(api_key):
+        return
+    with key_lock:
+        if not needs_seed(api_key):
+            return
+        key_cache["key"] = api_key
+        key_cache["expires"] = time.time() + key_cache_config["ttl"]
+        save_key_cache()
+
+def needs_seed(api_key: str) -> bool:
+    return api_key != key_cache["key"] or key_cache["expires"] - time.time() < key_cache_config["ttl"] / 10
+
+def invalidate(api_key: str = ""):
+    with key_lock:
+        if api_key and api_key != key_cache["key"] or not key_cache["key"]:
+            return
+        key_cache["key"], key_cache["expires"] = "", 0.0
+        save_key_cache()
+
+def get_cached(proxy_url: str, client: Client = None) -> str:
+    api_key = cached_key()
+    if api_key:
+        return api_key
+    with fetch_lock:
+        api_key = cached_key()
+        if api_key:
+            return api_key
+        api_key = get(proxy_url, client)
+        seed(api_key)
+    return api_key
+
+@instrument("api.get")
+def get(proxy_url: str, client: Client = None) -> str:
     headers = {
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
         "Accept-Language": "en",
@@ -21,11 +101,8 @@ def get(proxy_url: str) -> str:
         "Upgrade-Insecure-Requests": "1",
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     }
-    proxies = {}
-    if proxy_url:
-        proxies = {"http": proxy_url, "https": proxy_url}
-
-    response = requests.get(ep, headers=headers, proxies=proxies, timeout=60)  
+    response = get_client(client).get(ep, proxy_url, headers=headers, timeout=60)
+    record_response(response)
     response.raise_for_status() 
 
     body = response.text
@@ -0,0 +1,111 @@
+import json
+from datetime import date,timedelta
+from urllib.parse import urlencode
+import gobnb.api as api
+from gobnb.client import Client,get_client
+from gobnb.decode import loads
+from gobnb.metrics import instrument,record_response
+from gobnb.utils import get_nested_value
+
+calendar_hash = "8f08e03c7bd16fcad3c92a3592c19a8b559a0d0855a84028d1163d4733ed9ade"
+ep = f"https://www.airbnb.com/api/v3/PdpAvailabilityCalendar/{calendar_hash}"
+
+def Get_availability(room_id: int, proxy_url: str, client: Client = None, months: int = 12, start: str = "", currency: str = "USD") -> dict:
+    # one request for `months` months starting at the month of start (today by default),
+    # returns "YYYY-MM-DD" -> {"available", "available_for_checkin", "available_for_checkout", "min_nights", "max_nights"}
+    first = date.fromisoformat(start) if start else date.today()
+    api_key = api.get_cached(proxy_url, client)
+    return get_calendar(room_id, first.month, first.year, months, currency, api_key, proxy_url, client)
+
+def availability_for(room_id: int, date_ranges: list, proxy_url: str, client: Client = None, currency: str = "USD") -> dict:
+    # the calendar covering every range, empty if it can not be downloaded so nothing gets skipped
+    if len(date_ranges) == 0:
+        return {}
+    first, months = calendar_window(date_ranges)
+    try:
+        return Get_availability(room_id, proxy_url, client, months, first, currency)
+    except Exception:
+        return {}
+
+def calendar_window(date_ranges: list) -> tuple:
+    # first check in and the number of months up to the last check out
+    first = min(date.fromisoformat(check_in) for check_in, _ in date_ranges)
+    last = max(date.fromisoformat(check_out) for _, check_out in date_ranges)
+    return first.isoformat(), (last.year - first.year) * 12 + last.month - first.month + 1
+
+@instrument("get_calendar")
+def get_calendar(room_id: int, month: int, year: int, months: int, currency: str, api_key: str, proxy_url: str, client: Client = None) -> dict:
+    url, headers = build_request(room_id, month, year, months, currency, api_key)
+    response = get_client(client).get(url, proxy_url, headers=headers)
+    record_response(response)
+    if response.status_code in api.rejected_status:
+        api.invalidate(api_key)
+    response.raise_for_status()
+    return parse_calendar(loads(response.content))
+
+def build_request(room_id: int, month: int, year: int, months: int, currency: str, api_key: str):
+    headers = {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "X-Airbnb-Api-Key": api_key,
+    }
+    variables = {
+        "request": {
+            "count":     months,
+            "listingId": str(room_id),
+            "month":     month,
+            "year":      year,
+        },
+    }
+    extension = {
+        "persistedQuery": {
+            "version":    1,
+            "sha256Hash": calendar_hash,
+        },
+    }
+    query = {
+        "operationName": "PdpAvailabilityCalendar",
+        "locale":        "en",
+        "currency":      currency,
+        "variables":     json.dumps(variables),
+        "extensions":    json.dumps(extension),
+    }
+    return f"{ep}?{urlencode(query)}", headers
+
+def parse_calendar(data: dict) -> dict:
+    calendar = {}
+    for month in get_nested_value(data, "data.merlin.pdpAvailabilityCalendar.calendarMonths", []):
+        for day in month.get("days", []):
+            calendar[day["calendarDate"]] = {
+                "available":              day.get("available", False),
+                "available_for_checkin":  day.get("availableForCheckin", day.get("available", False)),
+                "available_for_checkout": day.get("availableForCheckout", True),
+                "min_nights":             day.get("minNights") or 0,
+                "max_nights":             day.get("maxNights") or 0,
+            }
+    return calendar
+
+def unavailable_reason(calendar: dict, check_in: str, check_out: str) -> str:
+    # "" when the stay can be booked or the calendar does not cover it, otherwise why it can not
+    if not calendar:
+        return ""
+    first = date.fromisoformat(check_in)
+    last = date.fromisoformat(check_out)
+    nights = (last - first).days
+    start = calendar.get(check_in)
+    if start is None or check_out not in calendar:
+        return ""
+    if not start["available_for_checkin"]:
+        return f"check in not available on {check_in}"
+    if not calendar[check_out]["available_for_checkout"]:
+        return f"check out not available on {check_out}"
+    if start["min_nights"] and nights < start["min_nights"]:
+        return f"minimum stay is {start['min_nights']} nights"
+    if start["max_nights"] and nights > start["max_nights"]:
+        return f"maximum stay is {start['max_nights']} nights"
+    for offset in range(nights):
+        day = (first + timedelta(days=offset)).isoformat()
+        if day in calendar and not calendar[day]["available"]:
+            return f"not available on {day}"
+    return ""
@@ -0,0 +1,163 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit,urlunsplit,parse_qsl,urlencode
+from curl_cffi.requests.exceptions import HTTPError
+
+#graphql variables left out of the key, the p3ImpressionId of the price only requests is random on every run
+volatile_variables = ("p3ImpressionId",)
+
+class CacheMiss(Exception):
+    pass
+
+class CachedResponse:
+    def __init__(self, url: str, status_code: int, headers: dict, cookies: dict, content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.cookies = cookies
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f"HTTP Error {self.status_code}: cached response for {self.url}", 0, self)
+
+class ResponseCache:
+    # mode "record" serves fresh entries from disk and stores every successful response,
+    # mode "replay" never touches the network: misses raise CacheMiss and the ttl is ignored
+    def __init__(self, path: str, ttl: float = None, max_bytes: int = 1024 * 1024 * 1024, mode: str = "record"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unknown cache mode: {mode}")
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._index = {}
+        self._size = 0
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if not name.endswith(".gz"):
+                continue
+            stat = os.stat(os.path.join(path, name))
+            self._index[name[:-3]] = [stat.st_size, stat.st_mtime]
+            self._size += stat.st_size
+
+    def key(self, method: str, url: str, json_body=None) -> str:
+        raw = json.dumps([method.upper(), stable_url(url), json_body], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.gz")
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._index.get(key)
+        if entry is None:
+            if self.mode == "replay":
+                raise CacheMiss(key)
+            return None
+        try:
+            with gzip.open(self._file(key), "rb") as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+        except OSError:
+            self._drop(key)
+            if self.mode == "replay":
+                raise CacheMiss(key)
+            return None
+        if self.mode == "record" and self.ttl is not None and time.time() - meta["created"] > self.ttl:
+            self._drop(key)
+            return None
+        now = time.time()
+        with self._lock:
+            entry[1] = now
+        try:
+            os.utime(self._file(key), (now, now))
+        except OSError:
+            # evicted by another thread after it was read, the content is still a valid answer
+            pass
+        return CachedResponse(meta["url"], meta["status_code"], meta["headers"], meta["cookies"], content)
+
+    def put(self, key: str, response):
+        if self.mode == "replay" or response.status_code >= 300:
+            return
+        meta = {
+            "url": str(response.url),
+            "status_code": response.status_code,
+            "headers": dict(response.headers),
+            "cookies": dict(response.cookies),
+            "created": time.time(),
+        }
+        tmp_file = f"{self._file(key)}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_file, "wb") as f:
+            f.write(json.dumps(meta).encode() + b"\n")
+            f.write(response.content)
+        os.replace(tmp_file, self._file(key))
+        size = os.path.getsize(self._file(key))
+        with self._lock:
+            previous = self._index.get(key)
+            if previous is not None:
+                self._size -= previous[0]
+            self._index[key] = [size, time.time()]
+            self._size += size
+        self._evict()
+
+    def _drop(self, key: str):
+        with self._lock:
+            entry = self._index.pop(key, None)
+            if entry is not None:
+                self._size -= entry[0]
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        with self._lock:
+            if self._size <= self.max_bytes:
+                return
+            keys = sorted(self._index, key=lambda key: self._index[key][1])
+        for key in keys:
+            if self._size <= self.max_bytes:
+                break
+            self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._index)
+        for key in keys:
+            self._drop(key)
+
+def stable_url(url: str) -> str:
+    # the url without the volatile variables, unchanged when it has none
+    parts = urlsplit(url)
+    if not any(name in parts.query for name in volatile_variables):
+        return url
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    for index, (name, value) in enumerate(query):
+        if name != "variables":
+            continue
+        try:
+            variables = json.loads(value)
+        except ValueError:
+            return url
+        if not isinstance(variables, dict):
+            return url
+        query[index] = (name, json.dumps(without_volatile(variables), sort_keys=True))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def without_volatile(value):
+    if isinstance(value, dict):
+        return {key: without_volatile(item) for key, item in value.items() if key not in volatile_variables}
+    return value
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor,as_completed
+from gobnb.client import Client
+from gobnb.details import Get_from_room_id
+from gobnb.proxies import ProxyPool
+from gobnb.search import search_pages
+from gobnb.standardize import check_fields
+
+class Journal:
+    # append-only json lines: the job, every finished search page with its next cursor and room ids,
+    # and every room whose details were written, a line is only added after its results are in the output
+    def __init__(self, path: str):
+        self.path = path
+        self.job = None
+        self.next_cursor = ""
+        self.room_ids = []
+        self.seen = set()
+        self.done = set()
+        if os.path.exists(path):
+            # bytes up to the end of the last entry that could be read
+            size = 0
+            complete = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    size += len(line)
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # the last line of a crawl killed while writing it
+                        continue
+                    complete = size
+                    self._apply(entry)
+            # new entries have to start on their own line: a cut off last line is removed, a missing newline added
+            with open(path, "r+b") as f:
+                f.truncate(complete)
+                if complete:
+                    f.seek(complete - 1)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _apply(self, entry: dict):
+        match entry["event"]:
+            case "job":
+                self.job = entry["job"]
+            case "page":
+                self.next_cursor = entry["next"]
+                for room_id in entry["room_ids"]:
+                    if room_id not in self.seen:
+                        self.seen.add(room_id)
+                        self.room_ids.append(room_id)
+            case "room":
+                self.done.add(entry["room_id"])
+
+    def search_done(self) -> bool:
+        return self.next_cursor is None
+
+    def append(self, entry: dict):
+        self._apply(entry)
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+class Output:
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, kind: str, room_id: int, data: dict):
+        self._file.write(json.dumps({"type": kind, "room_id": room_id, "data": data}) + "\n")
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="gobnb", description="crawl the listings of an area and their details, run it again with the same journal to resume")
+    parser.add_argument("--check-in", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--check-out", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--ne-lat", type=float, required=True)
+    parser.add_argument("--ne-long", type=float, required=True)
+    parser.add_argument("--sw-lat", type=float, required=True)
+    parser.add_argument("--sw-long", type=float, required=True)
+    parser.add_argument("--zoom", type=int, default=2)
+    parser.add_argument("--currency", default="USD")
+    parser.add_argument("--concurrency", type=int, default=4, help="details downloaded at the same time")
+    parser.add_argument("--proxy", action="append", default=[], help="proxy url, repeat it to use a pool of proxies")
+    parser.add_argument("--fields", help="comma separated detail fields, all of them by default")
+    parser.add_argument("--no-details", dest="details", action="store_false", help="only run the search")
+    parser.add_argument("--journal", default="gobnb.journal", help="checkpoint file, default %(default)s")
+    parser.add_argument("--output", default="gobnb.jsonl", help="json lines with the listings and details, default %(default)s")
+    return parser
+
+def main(argv: list = None) -> int:
+    cli = parser()
+    args = cli.parse_args(argv)
+    job = {
+        "check_in": args.check_in, "check_out": args.check_out,
+        "ne_lat": args.ne_lat, "ne_long": args.ne_long, "sw_lat": args.sw_lat, "sw_long": args.sw_long,
+        "zoom": args.zoom, "currency": args.currency, "details": args.details, "fields": args.fields,
+    }
+    fields = args.fields.split(",") if args.fields else None
+    try:
+        check_fields(fields)
+    except ValueError as e:
+        cli.error(str(e))
+    proxy_url = ""
+    if len(args.proxy) == 1:
+        proxy_url = args.proxy[0]
+    elif len(args.proxy) > 1:
+        proxy_url = ProxyPool(args.proxy)
+
+    journal = Journal(args.journal)
+    if journal.job is None:
+        journal.append({"event": "job", "job": job})
+    elif journal.job != job:
+        journal.close()
+        print(f"{args.journal} belongs to another job: {json.dumps(journal.job)}", file=sys.stderr)
+        return 2
+    output = Output(args.output)
+    client = Client(max_clients=max(args.concurrency, 10))
+    failed = 0
+    try:
+        if not journal.search_done():
+            if journal.next_cursor:
+                print(f"resuming the search after {len(journal.room_ids)} listings", file=sys.stderr)
+            pages = search_pages(args.check_in, args.check_out, args.ne_lat, args.ne_long, args.sw_lat, args.sw_long, args.zoom, args.currency, proxy_url, client, journal.next_cursor)
+            try:
+                for cursor, results, next_page in pages:
+                    for result in results:
+                        output.write("listing", result["room_id"], result)
+                    output.sync()
+                    journal.append({"event": "page", "cursor": cursor, "next": next_page, "room_ids": [result["room_id"] for result in results]})
+            except Exception as e:
+                print(f"search stopped: {e}, run the same command again to resume it", file=sys.stderr)
+                return 1
+        to_fetch = [room_id for room_id in journal.room_ids if room_id not in journal.done] if args.details else []
+        print(f"{len(journal.room_ids)} listings, {len(to_fetch)} details to download", file=sys.stderr)
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = {executor.submit(Get_from_room_id, room_id, args.currency, args.check_in, args.check_out, proxy_url, client, fields): room_id for room_id in to_fetch}
+            try:
+                for future in as_completed(futures):
+                    room_id = futures[future]
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        failed += 1
+                        print(f"room {room_id}: {e}", file=sys.stderr)
+                        continue
+                    output.write("details", room_id, data)
+                    output.sync()
+                    journal.append({"event": "room", "room_id": room_id})
+            finally:
+                for future in futures:
+                    future.cancel()
+    finally:
+        client.close()
+        output.close()
+        journal.close()
+    if failed:
+        print(f"{failed} rooms failed, run the same command again to retry them", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from curl_cffi import requests
+from curl_cffi.requests import AsyncSession
+from curl_cffi.requests.exceptions import RequestException
+from gobnb.cache import ResponseCache
+from gobnb.proxies import ProxyPool,StickyProxy,is_error_status
+from gobnb.ratelimit import RateController,retry_status,parse_retry_after
+
+def get_proxies(proxy_url: str) -> dict:
+    proxies = {}
+    if proxy_url:
+        proxies = {"http": proxy_url, "https": proxy_url}
+    return proxies
+
+def pool_of(proxy_url):
+    if isinstance(proxy_url, ProxyPool):
+        return proxy_url, ""
+    if isinstance(proxy_url, StickyProxy):
+        return proxy_url.pool, proxy_url.proxy_url
+    return None, proxy_url
+
+class Client:
+    # sessions are kept per proxy, a sync session (curl handles are not thread safe) is checked out by one thread
+    # for one request and returned to the idle sessions of its proxy, so there are never more sessions than requests
+    # that were in flight at once and every request made through the same client reuses warm keep-alive connections,
+    # http_version=None lets libcurl negotiate HTTP/2 over ALPN when the server supports it,
+    # an optional ResponseCache answers repeated requests from disk and an optional RateController
+    # paces the requests and retries the throttled or failed ones
+    def __init__(self, impersonate: str = None, timeout: float = None, http_version: str = None, max_clients: int = 10, cache: ResponseCache = None, rate: RateController = None):
+        self.impersonate = impersonate
+        self.timeout = timeout
+        self.http_version = http_version
+        self.max_clients = max_clients
+        self.cache = cache
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self._idle = {}
+        self._async_sessions = {}
+
+    def _session_kwargs(self, proxy_url: str) -> dict:
+        kwargs = {"proxies": get_proxies(proxy_url)}
+        if self.impersonate:
+            kwargs["impersonate"] = self.impersonate
+        if self.timeout:
+            kwargs["timeout"] = self.timeout
+        if self.http_version:
+            kwargs["http_version"] = self.http_version
+        return kwargs
+
+    @contextmanager
+    def session(self, proxy_url: str = ""):
+        with self._lock:
+            idle = self._idle.get(proxy_url)
+            session = idle.pop() if idle else None
+        if session is None:
+            session = requests.Session(**self._session_kwargs(proxy_url))
+            with self._lock:
+                self._sessions.add(session)
+        try:
+            yield session
+        finally:
+            with self._lock:
+                # closed while it was in use
+                returned = session in self._sessions
+                if returned:
+                    self._idle.setdefault(proxy_url, []).append(session)
+            if not returned:
+                session.close()
+
+    def session_count(self) -> int:
+        return len(self._sessions) + len(self._async_sessions)
+
+    async def async_session(self, proxy_url: str = "") -> AsyncSession:
+        # async sessions belong to the event loop they were created on, the ones left by a loop that was closed
+        # without aclose (asyncio.run on a shared client) are closed when the next loop needs a session
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.get((loop, proxy_url))
+        if session is None:
+            for key in [key for key in self._async_sessions if key[0].is_closed()]:
+                stale = self._async_sessions.pop(key, None)
+                if stale is not None:
+                    await stale.close()
+            session = AsyncSession(loop=loop, max_clients=self.max_clients, **self._session_kwargs(proxy_url))
+            self._async_sessions[(loop, proxy_url)] = session
+        return session
+
+    def request(self, method: str, url: str, proxy_url: str = "", **kwargs):
+        key = self._cache_key(method, url, kwargs)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        if self.rate is None:
+            response = self._send(method, url, proxy_url, kwargs)
+        else:
+            response = self._send_with_retries(method, url, proxy_url, kwargs)
+        if key:
+            self.cache.put(key, response)
+        return response
+
+    def _send_with_retries(self, method: str, url: str, proxy_url, kwargs: dict):
+        attempt = 0
+        while True:
+            self.rate.acquire()
+            start = time.monotonic()
+            try:
+                response = self._send(method, url, proxy_url, kwargs)
+            except RequestException:
+                self.rate.release(time.monotonic() - start, error=True)
+                if attempt >= self.rate.max_retries:
+                    raise
+                time.sleep(self.rate.retry_delay(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                self.rate.release(time.monotonic() - start, error=True)
+                raise
+            retry_after = parse_retry_after(response)
+            self.rate.release(time.monotonic() - start, response.status_code, retry_after=retry_after)
+            response.retries = attempt
+            if response.status_code not in retry_status or attempt >= self.rate.max_retries:
+                return response
+            time.sleep(self.rate.retry_delay(attempt, retry_after))
+            attempt += 1
+
+    def _send(self, method: str, url: str, proxy_url, kwargs: dict):
+        pool, prefer = pool_of(proxy_url)
+        if pool is None:
+            with self.session(proxy_url) as session:
+                response = session.request(method, url, **kwargs)
+        else:
+            proxy_url = pool.acquire(prefer)
+            start = time.monotonic()
+            try:
+                with self.session(proxy_url) as session:
+                    response = session.request(method, url, **kwargs)
+            except Exception:
+                pool.release(proxy_url, error=True)
+                raise
+            pool.release(proxy_url, time.monotonic() - start, is_error_status(response.status_code))
+        response.proxy_url = proxy_url
+        return response
+
+    def _cache_key(self, method: str, url: str, kwargs: dict) -> str:
+        if self.cache is None:
+            return ""
+        return self.cache.key(method, url, kwargs.get("json"))
+
+    def get(self, url: str, proxy_url: str = "", **kwargs):
+        return self.request("GET", url, proxy_url, **kwargs)
+
+    def post(self, url: str, proxy_url: str = "", **kwargs):
+        return self.request("POST", url, proxy_url, **kwargs)
+
+    async def async_request(self, method: str, url: str, proxy_url: str = "", **kwargs):
+        key = self._cache_key(method, url, kwargs)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        if self.rate is None:
+            response = await self._async_send(method, url, proxy_url, kwargs)
+        else:
+            response = await self._async_send_with_retries(method, url, proxy_url, kwargs)
+        if key:
+            self.cache.put(key, response)
+        return response
+
+    async def _async_send_with_retries(self, method: str, url: str, proxy_url, kwargs: dict):
+        attempt = 0
+        while True:
+            await self.rate.async_acquire()
+            start = time.monotonic()
+            try:
+                response = await self._async_send(method, url, proxy_url, kwargs)
+            except RequestException:
+                self.rate.release(time.monotonic() - start, error=True)
+                if attempt >= self.rate.max_retries:
+                    raise
+                await asyncio.sleep(self.rate.retry_delay(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                self.rate.release(time.monotonic() - start, error=True)
+                raise
+            retry_after = parse_retry_after(response)
+            self.rate.release(time.monotonic() - start, response.status_code, retry_after=retry_after)
+            response.retries = attempt
+            if response.status_code not in retry_status or attempt >= self.rate.max_retries:
+                return response
+            await asyncio.sleep(self.rate.retry_delay(attempt, retry_after))
+            attempt += 1
+
+    async def _async_send(self, method: str, url: str, proxy_url, kwargs: dict):
+        pool, prefer = pool_of(proxy_url)
+        if pool is None:
+            session = await self.async_session(proxy_url)
+            response = await session.request(method, url, **kwargs)
+        else:
+            proxy_url = await pool.async_acquire(prefer)
+            start = time.monotonic()
+            try:
+                session = await self.async_session(proxy_url)
+                response = await session.request(method, url, **kwargs)
+            except BaseException:
+                pool.release(proxy_url, error=True)
+                raise
+            pool.release(proxy_url, time.monotonic() - start, is_error_status(response.status_code))
+        response.proxy_url = proxy_url
+        return response
+
+    async def async_get(self, url: str, proxy_url: str = "", **kwargs):
+        return await self.async_request("GET", url, proxy_url, **kwargs)
+
+    async def async_post(self, url: str, proxy_url: str = "", **kwargs):
+        return await self.async_request("POST", url, proxy_url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, set()
+            self._idle = {}
+        for session in sessions:
+            session.close()
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        for key in [key for key in self._async_sessions if key[0] is loop or key[0].is_closed()]:
+            session = self._async_sessions.pop(key, None)
+            if session is not None:
+                await session.close()
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+default_client = Client()
+
+def get_client(client: Client = None) -> Client:
+    if client is None:
+        return default_client
+    return client
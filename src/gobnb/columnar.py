@@ -0,0 +1,136 @@
+from array import array
+
+nan = float("nan")
+
+int_columns = ("room_id", "review_count")
+float_columns = (
+    "latitude", "longitude", "rating",
+    "unit_amount", "unit_discount", "total_amount",
+    "cleaning_fee", "airbnb_fee", "long_stay_discount",
+)
+category_columns = ("category", "kind", "type", "unit_qualifier", "currency_symbol")
+string_columns = ("name", "title")
+
+class SearchColumns:
+    # typed column buffers for standardize_search results: int64/float64 arrays,
+    # dictionary encoded categories (int32 codes + values) and plain string lists,
+    # missing amounts are stored as NaN, a missing rating or coordinate keeps the 0 used by standardize_search
+    def __init__(self):
+        self.columns = {}
+        for name in int_columns:
+            self.columns[name] = array("q")
+        for name in float_columns:
+            self.columns[name] = array("d")
+        for name in category_columns:
+            self.columns[name] = array("i")
+        for name in string_columns:
+            self.columns[name] = []
+        self.categories = {name: {} for name in category_columns}
+
+    @classmethod
+    def from_listings(cls, listings):
+        columns = cls()
+        columns.extend(listings)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.columns["room_id"])
+
+    def _encode(self, name: str, value: str) -> int:
+        values = self.categories[name]
+        code = values.get(value)
+        if code is None:
+            code = len(values)
+            values[value] = code
+        return code
+
+    def append(self, listing: dict):
+        columns = self.columns
+        price = listing["price"]
+        unit = price["unit"]
+        total = price["total"]
+        rating = listing["rating"]
+        coordinates = listing["coordinates"]
+        columns["room_id"].append(listing["room_id"])
+        columns["review_count"].append(int(rating["reviewCount"] or 0))
+        columns["latitude"].append(coordinates["latitude"])
+        columns["longitude"].append(coordinates["longitud"])
+        columns["rating"].append(rating["value"])
+        columns["unit_amount"].append(unit.get("amount", nan))
+        columns["unit_discount"].append(unit.get("discount", nan))
+        columns["total_amount"].append(total.get("amount", nan))
+        columns["cleaning_fee"].append(listing["fee"]["cleaning"].get("amount", nan))
+        columns["airbnb_fee"].append(listing["fee"]["airbnb"].get("amount", nan))
+        columns["long_stay_discount"].append(listing["long_stay_discount"].get("amount", nan))
+        columns["category"].append(self._encode("category", listing["category"]))
+        columns["kind"].append(self._encode("kind", listing["kind"]))
+        columns["type"].append(self._encode("type", listing["type"]))
+        columns["unit_qualifier"].append(self._encode("unit_qualifier", unit.get("qualifier", "")))
+        columns["currency_symbol"].append(self._encode("currency_symbol", total.get("currency_symbol", "")))
+        columns["name"].append(listing["name"])
+        columns["title"].append(listing["title"])
+
+    def extend(self, listings):
+        for listing in listings:
+            self.append(listing)
+
+    def dictionary(self, name: str) -> list:
+        return list(self.categories[name])
+
+    def nbytes(self) -> int:
+        size = 0
+        for name, column in self.columns.items():
+            if name in string_columns:
+                size += sum(len(value.encode()) for value in column)
+            else:
+                size += column.itemsize * len(column)
+        return size
+
+    def _buffer(self, name: str, copy: bool):
+        # a buffer exported without a copy locks the array, append/extend raise BufferError while the result is alive
+        column = self.columns[name]
+        return column.tobytes() if copy else column
+
+    def to_numpy(self, copy: bool = True) -> dict:
+        # copy=False returns views on the columns, faster but no more listings can be added while they are referenced
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("numpy is required for SearchColumns.to_numpy, install gobnb[columnar]")
+        data = {}
+        for name in int_columns:
+            data[name] = np.array(self.columns[name], dtype=np.int64, copy=copy)
+        for name in float_columns:
+            data[name] = np.array(self.columns[name], dtype=np.float64, copy=copy)
+        for name in category_columns:
+            data[name] = np.array(self.dictionary(name), dtype=object)[np.frombuffer(self.columns[name], dtype=np.int32)]
+        for name in string_columns:
+            data[name] = np.array(self.columns[name], dtype=object)
+        return data
+
+    def to_arrow(self, copy: bool = True):
+        # copy=False shares the column buffers with the table, see to_numpy
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("pyarrow is required for SearchColumns.to_arrow, install gobnb[columnar]")
+        size = len(self)
+        arrays = {}
+        for name in int_columns:
+            arrays[name] = pa.Array.from_buffers(pa.int64(), size, [None, pa.py_buffer(self._buffer(name, copy))])
+        for name in float_columns:
+            arrays[name] = pa.Array.from_buffers(pa.float64(), size, [None, pa.py_buffer(self._buffer(name, copy))])
+        for name in category_columns:
+            indices = pa.Array.from_buffers(pa.int32(), size, [None, pa.py_buffer(self._buffer(name, copy))])
+            arrays[name] = pa.DictionaryArray.from_arrays(indices, pa.array(self.dictionary(name), type=pa.string()))
+        for name in string_columns:
+            arrays[name] = pa.array(self.columns[name], type=pa.string())
+        return pa.table(arrays)
+
+    def to_parquet(self, path: str, compression: str = "zstd"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required for SearchColumns.to_parquet, install gobnb[columnar]")
+        # the table only lives during the write
+        pq.write_table(self.to_arrow(copy=False), path, compression=compression)
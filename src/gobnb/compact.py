@@ -0,0 +1,121 @@
+import sys
+
+#keys of the "rating" dict built by standardize_details, in its order
+rating_keys = ("accuracy","checking","cleanliness","communication","location","value","guest_satisfaction","review_count")
+host_keys = ("id","name","joined_on","description")
+
+class Missing:
+    # marks the keys standardize_details did not set (e.g. "title" without a PdpTitleSection)
+    __slots__ = ()
+
+    def __repr__(self):
+        return "missing"
+
+    def __reduce__(self):
+        return "missing"
+
+missing = Missing()
+
+def short(value):
+    # titles, icons and labels repeat across listings, long texts (descriptions) do not and are kept as they are
+    if type(value) is str and len(value) <= 80:
+        return sys.intern(value)
+    return value
+
+def split_url(url: str) -> tuple:
+    # https://a0.muscache.com/im/pictures/miso/Hosting-1/original/ is shared by the images of a listing
+    index = url.rfind("/") + 1
+    if index == 0:
+        return "", url
+    return sys.intern(url[:index]), url[index:]
+
+def reintern(value):
+    if type(value) is tuple:
+        return tuple(reintern(item) for item in value)
+    return short(value)
+
+class CompactDetails:
+    # standardize_details output stored as tuples of interned strings, image urls as an interned prefix plus
+    # a suffix, keys added later (price, prices) go to extra, to_dict() returns the original dict
+    __slots__ = ("latitude","longitude","room_type","is_super_host","home_tier","person_capacity","rating",
+                 "house_rules","host","sub_description","amenities","co_hosts","images","location_descriptions",
+                 "highlights","title","description","language","extra")
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        record = cls()
+        record.latitude = data["coordinates"]["latitude"]
+        record.longitude = data["coordinates"]["longitude"]
+        record.room_type = short(data["room_type"])
+        record.is_super_host = data["is_super_host"]
+        record.home_tier = data["home_tier"]
+        record.person_capacity = data["person_capacity"]
+        record.rating = tuple(data["rating"][key] for key in rating_keys)
+        house_rules = data["house_rules"]
+        record.house_rules = (house_rules["aditional"], tuple(
+            (short(rule["title"]), tuple((short(value["title"]), short(value["icon"])) for value in rule["values"]))
+            for rule in house_rules["general"]
+        ))
+        record.host = tuple(short(data["host"].get(key, missing)) for key in host_keys)
+        sub_description = data["sub_description"]
+        record.sub_description = (short(sub_description["title"]), tuple(short(item) for item in sub_description["items"]))
+        record.amenities = tuple(
+            (short(group["title"]), tuple((short(amenity["title"]), short(amenity["subtitle"]), short(amenity["icon"]), amenity["available"]) for amenity in group["values"]))
+            for group in data["amenities"]
+        )
+        record.co_hosts = tuple((cohost["id"], short(cohost["name"])) for cohost in data["co_hosts"])
+        record.images = tuple((short(image["title"]),) + split_url(image["url"]) for image in data["images"])
+        record.location_descriptions = tuple((short(location["title"]), location["content"]) for location in data["location_descriptions"])
+        record.highlights = tuple((short(highlight["title"]), short(highlight["subtitle"]), short(highlight["icon"])) for highlight in data["highlights"])
+        record.title = data.get("title", missing)
+        record.description = data.get("description", missing)
+        record.language = short(data.get("language", missing))
+        record.extra = {key: value for key, value in data.items() if key not in known_keys}
+        return record
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        # unpickled strings are new objects, interning them again keeps them shared in the receiving process
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value if name == "extra" else reintern(value))
+
+    def to_dict(self) -> dict:
+        data = {
+            "coordinates": {
+                "latitude":  self.latitude,
+                "longitude": self.longitude,
+            },
+            "room_type":       self.room_type,
+            "is_super_host":   self.is_super_host,
+            "home_tier":       self.home_tier,
+            "person_capacity": self.person_capacity,
+            "rating":          dict(zip(rating_keys, self.rating)),
+            "house_rules": {
+                "aditional": self.house_rules[0],
+                "general": [{"title": title, "values": [{"title": value_title, "icon": icon} for value_title, icon in values]} for title, values in self.house_rules[1]],
+            },
+            "host": {key: value for key, value in zip(host_keys, self.host) if value is not missing},
+            "sub_description": {
+                "title": self.sub_description[0],
+                "items": list(self.sub_description[1]),
+            },
+            "amenities": [
+                {"title": title, "values": [{"title": amenity_title, "subtitle": subtitle, "icon": icon, "available": available} for amenity_title, subtitle, icon, available in values]}
+                for title, values in self.amenities
+            ],
+            "co_hosts":              [{"id": cohost_id, "name": name} for cohost_id, name in self.co_hosts],
+            "images":                [{"title": title, "url": prefix + suffix} for title, prefix, suffix in self.images],
+            "location_descriptions": [{"title": title, "content": content} for title, content in self.location_descriptions],
+            "highlights":            [{"title": title, "subtitle": subtitle, "icon": icon} for title, subtitle, icon in self.highlights],
+        }
+        for key in ("title", "description", "language"):
+            value = getattr(self, key)
+            if value is not missing:
+                data[key] = value
+        data.update(self.extra)
+        return data
+
+known_keys = {"coordinates","room_type","is_super_host","home_tier","person_capacity","rating","house_rules","host",
+              "sub_description","amenities","co_hosts","images","location_descriptions","highlights","title","description","language"}
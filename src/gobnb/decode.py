@@ -0,0 +1,171 @@
+import json
+from typing import Any,Optional,TypedDict
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# the schemas only declare what standardize_search, standardize_details and parse_price read, msgspec skips
+# everything else while decoding and still returns plain dicts, without msgspec the whole document is decoded
+# with orjson or the json module
+
+class PriceItem(TypedDict, total=False):
+    description: Any
+    priceString: Any
+    displayComponentType: Any
+
+class PriceDetail(TypedDict, total=False):
+    items: Optional[list[PriceItem]]
+
+class ExplanationData(TypedDict, total=False):
+    priceDetails: Optional[list[PriceDetail]]
+
+class DisplayPrice(TypedDict, total=False):
+    primaryLine: Any
+    secondaryLine: Any
+    explanationData: Optional[ExplanationData]
+
+class PricingQuote(TypedDict, total=False):
+    structuredStayDisplayPrice: Optional[DisplayPrice]
+
+class Badge(TypedDict, total=False):
+    loggingContext: Any
+
+class Picture(TypedDict, total=False):
+    picture: Any
+
+class SearchListing(TypedDict, total=False):
+    id: Any
+    roomTypeCategory: Any
+    pdpUrlType: Any
+    name: Any
+    title: Any
+    listingObjType: Any
+    coordinate: Any
+    formattedBadges: Optional[list[Badge]]
+    avgRatingLocalized: Any
+    contextualPictures: Optional[list[Picture]]
+
+#functional syntax, a __typename annotation in a class body would be name mangled
+SearchResult = TypedDict("SearchResult", {
+    "__typename":   Any,
+    "listing":      Optional[SearchListing],
+    "pricingQuote": Optional[PricingQuote],
+}, total=False)
+
+class SearchResults(TypedDict, total=False):
+    searchResults: Optional[list[SearchResult]]
+    paginationInfo: Any
+
+class StaysSearch(TypedDict, total=False):
+    results: Optional[SearchResults]
+
+class SearchPresentation(TypedDict, total=False):
+    staysSearch: Optional[StaysSearch]
+
+class SearchData(TypedDict, total=False):
+    presentation: Optional[SearchPresentation]
+
+class SearchResponse(TypedDict, total=False):
+    data: Optional[SearchData]
+
+class MediaItem(TypedDict, total=False):
+    accessibilityLabel: Any
+    baseUrl: Any
+
+class Amenity(TypedDict, total=False):
+    title: Any
+    subtitle: Any
+    icon: Any
+    available: Any
+
+class AmenityGroup(TypedDict, total=False):
+    title: Any
+    amenities: Optional[list[Amenity]]
+
+Section = TypedDict("Section", {
+    "__typename":             Any,
+    "title":                  Any,
+    "subtitle":               Any,
+    "hostAvatar":             Any,
+    "hostProfileDescription": Any,
+    "additionalHosts":        Any,
+    "mediaItems":             Optional[list[MediaItem]],
+    "houseRulesSections":     Any,
+    "seeAllLocationDetails":  Any,
+    "highlights":             Any,
+    "htmlDescription":        Any,
+    "seeAllAmenitiesGroups":  Optional[list[AmenityGroup]],
+    "structuredDisplayPrice": Any,
+}, total=False)
+
+class SectionContainer(TypedDict, total=False):
+    sectionId: Any
+    section: Optional[Section]
+
+class SbuiSection(TypedDict, total=False):
+    sectionData: Any
+
+class SbuiRoot(TypedDict, total=False):
+    sections: Optional[list[SbuiSection]]
+
+class SbuiConfiguration(TypedDict, total=False):
+    root: Optional[SbuiRoot]
+
+class SbuiData(TypedDict, total=False):
+    sectionConfiguration: Optional[SbuiConfiguration]
+
+class LoggingContext(TypedDict, total=False):
+    eventDataLogging: Any
+
+class SectionsMetadata(TypedDict, total=False):
+    loggingContext: Optional[LoggingContext]
+
+class Sections(TypedDict, total=False):
+    metadata: Optional[SectionsMetadata]
+    sbuiData: Optional[SbuiData]
+    sections: Optional[list[SectionContainer]]
+
+class StayProductDetailPage(TypedDict, total=False):
+    sections: Optional[Sections]
+
+class DetailsPresentation(TypedDict, total=False):
+    stayProductDetailPage: Optional[StayProductDetailPage]
+
+class DetailsData(TypedDict, total=False):
+    presentation: Optional[DetailsPresentation]
+
+class PdpSectionsRequest(TypedDict, total=False):
+    p3ImpressionId: Any
+
+class DetailsVariables(TypedDict, total=False):
+    id: Any
+    pdpSectionsRequest: Optional[PdpSectionsRequest]
+
+class Details(TypedDict, total=False):
+    variables: Optional[DetailsVariables]
+    data: Optional[DetailsData]
+
+class DeferredState(TypedDict, total=False):
+    niobeMinimalClientData: list[tuple[Any, Optional[Details]]]
+
+#StaysPdpSections answers with the same shape as the room page details
+PriceResponse = Details
+
+def loads(raw, schema=None):
+    # raw can be bytes or str, a document that does not match the schema is decoded again in full,
+    # so the result never depends on the decoder and invalid json raises ValueError in every case
+    if msgspec is not None and schema is not None:
+        try:
+            return msgspec.json.decode(raw, type=schema)
+        except msgspec.MsgspecError:
+            pass
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
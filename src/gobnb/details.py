@@ -1,59 +1,124 @@
-from curl_cffi import requests
+import gobnb.api as api
+from concurrent.futures import ThreadPoolExecutor
+from curl_cffi.requests.exceptions import HTTPError
+from gobnb.proxies import sticky
+from gobnb.availability import availability_for,unavailable_reason
+from gobnb.client import Client,get_client
+from gobnb.metrics import instrument,record_response
 from gobnb.parse import parse_body_details_wrapper
-from gobnb.price import get_price
+from gobnb.standardize import check_fields
+from gobnb.price import get_price,section_ids_for,price_section_ids,product_id_for,impression_id_for,impression_ids,is_rejected
 
-def Get_from_room_url(roomURL: str, currency: str, check_in: str, check_out: str, proxy_url: str):
-    data, price_input, cookies = get_from_room_url(roomURL, proxy_url)
+headers = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Language": "en",
+    "Cache-Control": "no-cache",
+    "Pragma": "no-cache",
+    "Sec-Ch-Ua": '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+    "Sec-Ch-Ua-Mobile": "?0",
+    "Sec-Ch-Ua-Platform": '"Windows"',
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Sec-Fetch-User": "?1",
+    "Upgrade-Insecure-Requests": "1",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+def Get_from_room_url(roomURL: str, currency: str, check_in: str, check_out: str, proxy_url: str, client: Client = None, fields: list = None):
+    data, price_input, cookies = get_from_room_url(roomURL, proxy_url, client, fields)
     if check_in is None or check_in == "" or check_out is None or check_out == "":
         return data
-    dataFullPrice = get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, proxy_url)
+    dataFullPrice = get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, price_input["proxy_url"], client, section_ids=section_ids_for(fields))
     data["price"] = dataFullPrice
     return data
-def Get_from_room_id(room_id: int, currency: str, check_in: str, check_out: str, proxy_url: str):
+def Get_from_room_id(room_id: int, currency: str, check_in: str, check_out: str, proxy_url: str, client: Client = None, fields: list = None):
     room_url = f"https://www.airbnb.com/rooms/{room_id}"
-    data, price_input, cookies = get_from_room_url(room_url, proxy_url)
+    data, price_input, cookies = get_from_room_url(room_url, proxy_url, client, fields)
     if check_in is None or check_in == "" or check_out is None or check_out == "":
         return data
-    dataFullPrice = get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, proxy_url)
+    dataFullPrice = get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, price_input["proxy_url"], client, section_ids=section_ids_for(fields))
     data["price"] = dataFullPrice
     return data
 
-def Get_from_room_id_and_domain(room_id: int, domain: str, currency: str, check_in: str, check_out: str, proxy_url: str):
+def Get_from_room_id_and_domain(room_id: int, domain: str, currency: str, check_in: str, check_out: str, proxy_url: str, client: Client = None, fields: list = None):
     room_url = f"https://{domain}/rooms/{room_id}"
-    data, price_input, cookies = get_from_room_url(room_url, proxy_url)
+    data, price_input, cookies = get_from_room_url(room_url, proxy_url, client, fields)
     if check_in is None or check_in == "" or check_out is None or check_out == "":
         return data
-    dataFullPrice = get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, proxy_url)
+    dataFullPrice = get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, price_input["proxy_url"], client, section_ids=section_ids_for(fields))
     data["price"] = dataFullPrice
     return data
 
-def Get_price_by_url(roomURL: str, currency: str, check_in: str, check_out: str, proxy_url: str):
-    data, price_input, cookies = get_from_room_url(roomURL, proxy_url)
-    dataFullPrice = get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, proxy_url)
+def Get_price_by_url(roomURL: str, currency: str, check_in: str, check_out: str, proxy_url: str, client: Client = None, fields: list = None):
+    data, price_input, cookies = get_from_room_url(roomURL, proxy_url, client, fields)
+    dataFullPrice = get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, price_input["proxy_url"], client, section_ids=section_ids_for(fields))
     data["price"] = dataFullPrice
     return data
 
-def get_from_room_url(room_url: str, proxy_url: str):
-    headers = {
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-        "Accept-Language": "en",
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache",
-        "Sec-Ch-Ua": '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-        "Sec-Ch-Ua-Mobile": "?0",
-        "Sec-Ch-Ua-Platform": '"Windows"',
-        "Sec-Fetch-Dest": "document",
-        "Sec-Fetch-Mode": "navigate",
-        "Sec-Fetch-Site": "none",
-        "Sec-Fetch-User": "?1",
-        "Upgrade-Insecure-Requests": "1",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
-    proxies = {}
-    if proxy_url:
-        proxies = {"http": proxy_url, "https": proxy_url}
-    response = requests.get(room_url, headers=headers, proxies=proxies)
-    response.raise_for_status()
-    data_formatted, price_dependency_input=parse_body_details_wrapper(response.text)
+def Get_price_by_room_id(room_id: int, currency: str, check_in: str, check_out: str, proxy_url: str, client: Client = None, adults: int = 1, calendar: dict = None):
+    # price only, the room page is not downloaded: the product id comes from the room id, the api key from the
+    # key cache and the impression id is reused or generated, the page is only fetched when airbnb rejects them
+    # (an empty price is a stay that can not be booked, not a rejection),
+    # with the calendar from Get_availability a stay that can not be booked returns {} without any request
+    if calendar and unavailable_reason(calendar, check_in, check_out):
+        return {}
+    impression_id = impression_id_for(room_id)
+    try:
+        price = get_price(product_id_for(room_id), impression_id, api.get_cached(proxy_url, client), currency, {}, check_in, check_out, proxy_url, client, adults, price_section_ids)
+    except HTTPError as e:
+        if not is_rejected(e):
+            raise
+        room_url = f"https://www.airbnb.com/rooms/{room_id}"
+        _, price_input, cookies = get_from_room_url(room_url, proxy_url, client, [])
+        impression_id = price_input["impression_id"]
+        price = get_price(price_input["product_id"],impression_id,price_input["api_key"],currency, cookies, check_in, check_out, price_input["proxy_url"], client, adults, price_section_ids)
+    # an accepted impression id is kept even without a price, {} is the answer for dates that can not be booked
+    impression_ids[str(room_id)] = impression_id
+    return price
+
+def Get_price_calendar(room_id: int, currency: str, date_ranges: list, proxy_url: str, client: Client = None, adults: list = None, concurrency: int = 8, fields: list = None, check_availability: bool = True):
+    # with check_availability the availability calendar is downloaded first (one request) and the ranges that can not
+    # be booked are not priced, their row has the reason in "skipped"
+    room_url = f"https://www.airbnb.com/rooms/{room_id}"
+    data, price_input, cookies = get_from_room_url(room_url, proxy_url, client, fields)
+    calendar = availability_for(room_id, date_ranges, proxy_url, client, currency) if check_availability else {}
+    data["prices"] = price_calendar(price_input, currency, cookies, date_ranges, proxy_url, client, adults, concurrency, section_ids_for(fields), calendar)
+    return data
+
+def price_calendar(price_input: dict, currency: str, cookies: list, date_ranges: list, proxy_url: str, client: Client = None, adults: list = None, concurrency: int = 8, section_ids: list = None, calendar: dict = None):
+    if not adults:
+        adults = [1]
+    jobs = [(check_in, check_out, guests) for check_in, check_out in date_ranges for guests in adults]
+
+    def run(job):
+        check_in, check_out, guests = job
+        row = {"check_in": check_in, "check_out": check_out, "adults": guests, "price": {}, "error": "", "skipped": ""}
+        if calendar:
+            row["skipped"] = unavailable_reason(calendar, check_in, check_out)
+            if row["skipped"]:
+                return row
+        try:
+            row["price"] = get_price(price_input["product_id"],price_input["impression_id"],price_input["api_key"],currency, cookies, check_in, check_out, price_input["proxy_url"], client, guests, section_ids)
+        except Exception as e:
+            row["error"] = str(e)
+        return row
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(run, jobs))
+
+@instrument("get_from_room_url")
+def get_from_room_url(room_url: str, proxy_url: str, client: Client = None, fields: list = None):
+    check_fields(fields)
+    response = fetch_room_page(room_url, proxy_url, client)
+    data_formatted, price_dependency_input=parse_body_details_wrapper(response.text, fields)
+    api.seed(price_dependency_input["api_key"])
+    price_dependency_input["proxy_url"] = sticky(proxy_url, response)
     cookies = response.cookies
-    return data_formatted, price_dependency_input, cookies
\ No newline at end of file
+    return data_formatted, price_dependency_input, cookies
+
+def fetch_room_page(room_url: str, proxy_url: str, client: Client = None):
+    response = get_client(client).get(room_url, proxy_url, headers=headers)
+    record_response(response)
+    response.raise_for_status()
+    return response
@@ -0,0 +1,102 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from gobnb.client import Client
+from gobnb.details import Get_from_room_id
+from gobnb.search import Search_iter
+
+def fingerprint(listing: dict) -> str:
+    price = listing.get("price", {})
+    rating = listing.get("rating", {})
+    watched = [
+        price.get("unit", {}).get("amount"),
+        price.get("unit", {}).get("discount"),
+        price.get("total", {}).get("amount"),
+        rating.get("value"),
+        str(rating.get("reviewCount")),
+        sorted(listing.get("badges", [])),
+        sorted(image.get("url", "") for image in listing.get("images", [])),
+    ]
+    raw = json.dumps(watched, separators=(",", ":"))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+class FingerprintStore:
+    # room_id -> fingerprint of the last crawl that fetched its details, one file per searched area
+    def __init__(self, path: str):
+        self.path = path
+        self.fingerprints = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.fingerprints = json.load(f)
+
+    def get(self, room_id) -> str:
+        return self.fingerprints.get(str(room_id), "")
+
+    def set(self, room_id, value: str):
+        self.fingerprints[str(room_id)] = value
+
+    def remove(self, room_id):
+        self.fingerprints.pop(str(room_id), None)
+
+    def room_ids(self) -> set:
+        return set(self.fingerprints)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.fingerprints, f)
+        os.replace(tmp_path, self.path)
+
+def diff(listings: list, store: FingerprintStore) -> dict:
+    changes = {"added": [], "changed": [], "unchanged": [], "removed": [], "fingerprints": {}}
+    seen = set()
+    for listing in listings:
+        room_id = listing["room_id"]
+        if str(room_id) in seen:
+            continue
+        seen.add(str(room_id))
+        value = fingerprint(listing)
+        changes["fingerprints"][room_id] = value
+        previous = store.get(room_id)
+        if previous == "":
+            changes["added"].append(room_id)
+        elif previous != value:
+            changes["changed"].append(room_id)
+        else:
+            changes["unchanged"].append(room_id)
+    changes["removed"] = [int(room_id) for room_id in store.room_ids() - seen]
+    return changes
+
+def Crawl_incremental(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, currency:str, proxy_url:str, state_path:str, client:Client=None, concurrency:int=4, fields:list=None):
+    store = FingerprintStore(state_path)
+    listings = list(Search_iter(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,currency,proxy_url,client))
+    changes = diff(listings, store)
+    to_fetch = changes["added"] + changes["changed"]
+
+    def run(room_id):
+        try:
+            return room_id, Get_from_room_id(room_id, currency, check_in, check_out, proxy_url, client, fields), ""
+        except Exception as e:
+            return room_id, None, str(e)
+
+    report = {
+        "added": changes["added"],
+        "changed": changes["changed"],
+        "removed": changes["removed"],
+        "unchanged": changes["unchanged"],
+        "listings": listings,
+        "details": {},
+        "errors": {},
+    }
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for room_id, data, error in executor.map(run, to_fetch):
+            if error:
+                report["errors"][room_id] = error
+                continue
+            report["details"][room_id] = data
+            store.set(room_id, changes["fingerprints"][room_id])
+    for room_id in changes["removed"]:
+        store.remove(room_id)
+    store.save()
+    return report
@@ -0,0 +1,137 @@
+import json
+import time
+import asyncio
+import functools
+import threading
+import contextvars
+
+hooks = []
+current_event = contextvars.ContextVar("gobnb_current_event", default=None)
+
+def add_hook(hook):
+    if hook not in hooks:
+        hooks.append(hook)
+
+def remove_hook(hook):
+    if hook in hooks:
+        hooks.remove(hook)
+
+def emit(event: dict):
+    for hook in list(hooks):
+        hook(event)
+
+def new_event(stage: str) -> dict:
+    return {"stage": stage, "seconds": 0.0, "bytes": 0, "status": 0, "retries": 0, "error": ""}
+
+def instrument(stage: str):
+    # times the call and sends {"stage", "seconds", "bytes", "status", "retries", "error"} to every hook,
+    # record_response fills the http fields of the innermost instrumented call, nothing is measured without hooks
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not hooks:
+                    return await fn(*args, **kwargs)
+                event = new_event(stage)
+                token = current_event.set(event)
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception as e:
+                    event["error"] = type(e).__name__
+                    raise
+                finally:
+                    event["seconds"] = time.perf_counter() - start
+                    current_event.reset(token)
+                    emit(event)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not hooks:
+                return fn(*args, **kwargs)
+            event = new_event(stage)
+            token = current_event.set(event)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                event["error"] = type(e).__name__
+                raise
+            finally:
+                event["seconds"] = time.perf_counter() - start
+                current_event.reset(token)
+                emit(event)
+        return wrapper
+    return decorator
+
+def record_response(response):
+    event = current_event.get()
+    if event is None:
+        return
+    event["status"] = response.status_code
+    event["bytes"] += len(response.content)
+    event["retries"] += getattr(response, "retries", 0)
+
+class Stats:
+    # a hook aggregating the events per stage, add it with add_hook(stats)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def __call__(self, event: dict):
+        with self._lock:
+            stage = self.stages.get(event["stage"])
+            if stage is None:
+                stage = {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0, "bytes": 0, "retries": 0, "status": {}}
+                self.stages[event["stage"]] = stage
+            stage["calls"] += 1
+            stage["seconds"] += event["seconds"]
+            stage["max_seconds"] = max(stage["max_seconds"], event["seconds"])
+            stage["bytes"] += event["bytes"]
+            stage["retries"] += event["retries"]
+            if event["error"]:
+                stage["errors"] += 1
+            if event["status"]:
+                code = str(event["status"])
+                stage["status"][code] = stage["status"].get(code, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            data = {}
+            for name, stage in self.stages.items():
+                data[name] = dict(stage, status=dict(stage["status"]))
+                data[name]["avg_seconds"] = stage["seconds"] / stage["calls"]
+            return data
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    def to_prometheus(self, prefix: str = "gobnb") -> str:
+        lines = []
+        metrics = [
+            ("calls_total", "counter", "calls", "number of calls"),
+            ("errors_total", "counter", "errors", "number of calls that raised"),
+            ("seconds_sum", "counter", "seconds", "total time spent"),
+            ("seconds_max", "gauge", "max_seconds", "slowest call"),
+            ("response_bytes_total", "counter", "bytes", "response body bytes"),
+            ("retries_total", "counter", "retries", "http retries"),
+        ]
+        data = self.to_dict()
+        for suffix, kind, key, help_text in metrics:
+            name = f"{prefix}_stage_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for stage, values in data.items():
+                lines.append(f'{name}{{stage="{stage}"}} {values[key]}')
+        name = f"{prefix}_stage_status_total"
+        lines.append(f"# HELP {name} responses by status code")
+        lines.append(f"# TYPE {name} counter")
+        for stage, values in data.items():
+            for code, count in values["status"].items():
+                lines.append(f'{name}{{stage="{stage}",code="{code}"}} {count}')
+        return "\n".join(lines) + "\n"
@@ -1,16 +1,18 @@
 import re
-import json
 from bs4 import BeautifulSoup
 from gobnb.standardize import standardize_details
 from gobnb.utils import remove_space
+from gobnb.decode import loads,DeferredState
+from gobnb.compact import CompactDetails
+from gobnb.metrics import instrument
 
 regxApiKey = re.compile(r'"key":".+?"')
 regexLanguage = re.compile(r'"language":".+?"')
 
 
-def parse_body_details_wrapper(body:str):
+def parse_body_details_wrapper(body:str, fields:list=None):
     data_raw, language, api_key = parse_body_details(body)
-    data_formatted = standardize_details(data_raw) 
+    data_formatted = standardize_details(data_raw, fields)
     data_formatted["language"] = language
     price_dependency_input={
         "product_id": data_raw['variables']['id'],
@@ -19,16 +21,38 @@ def parse_body_details_wrapper(body:str):
     }
     return data_formatted, price_dependency_input
 
+def parse_room_page(body:bytes, fields:list=None, compact:bool=False):
+    data_formatted, price_dependency_input = parse_body_details_wrapper(body.decode("utf-8", errors="replace"), fields)
+    if compact:
+        data_formatted = CompactDetails.from_dict(data_formatted)
+    return data_formatted, price_dependency_input
+
+@instrument("parse_body_details")
 def parse_body_details(body:str):
-    soup = BeautifulSoup(body, 'html.parser')
-    data_deferred_state = soup.select("#data-deferred-state-0")[0].getText()
-    html_data = remove_space(data_deferred_state)
+    data = extract_deferred_state(body)
+    if data is None:
+        soup = BeautifulSoup(body, 'html.parser')
+        data_deferred_state = soup.select("#data-deferred-state-0")[0].getText()
+        html_data = remove_space(data_deferred_state)
+        data = loads(html_data, DeferredState)
     language = regexLanguage.search(body).group()
     language = language.replace('"language":"', "")
     language = language.replace('"', "")
     api_key = regxApiKey.search(body).group()
     api_key = api_key.replace('"key":"', "")
     api_key = api_key.replace('"', "")
-    data = json.loads(html_data)
     details_data = data["niobeMinimalClientData"][0][1]
     return details_data, language, api_key
+
+def extract_deferred_state(body:str):
+    marker = body.find('id="data-deferred-state-0"')
+    if marker == -1:
+        return None
+    start = body.find(">", marker)
+    end = body.find("</script>", start)
+    if start == -1 or end == -1:
+        return None
+    try:
+        return loads(body[start+1:end], DeferredState)
+    except ValueError:
+        return None
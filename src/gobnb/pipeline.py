@@ -0,0 +1,96 @@
+import os
+import multiprocessing
+import gobnb.api as api
+from concurrent.futures import ThreadPoolExecutor,ProcessPoolExecutor,wait,FIRST_COMPLETED
+from gobnb.client import Client
+from gobnb.details import fetch_room_page
+from gobnb.metrics import instrument,emit,hooks,add_hook
+from gobnb.parse import parse_room_page
+from gobnb.price import get_price,section_ids_for
+from gobnb.proxies import sticky
+
+@instrument("fetch_room_page")
+def fetch(room_id: int, proxy_url: str, client: Client):
+    response = fetch_room_page(f"https://www.airbnb.com/rooms/{room_id}", proxy_url, client)
+    return response.content, dict(response.cookies), sticky(proxy_url, response)
+
+#events of the stages run in a parse worker, sent back to the parent with the result
+worker_events = []
+
+def start_worker(measure: bool):
+    # hooks are never run in the workers, with measure the events are collected and emitted by the parent
+    hooks.clear()
+    if measure:
+        add_hook(worker_events.append)
+
+def parse_in_worker(body: bytes, fields: list, compact: bool):
+    worker_events.clear()
+    try:
+        return parse_room_page(body, fields, compact), list(worker_events), None
+    except Exception as e:
+        return None, list(worker_events), e
+
+def worker_context():
+    # forking while fetch threads hold locks (a hook's, the client's) would copy them locked into the workers
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+def Get_many(room_ids: list, currency: str, check_in: str, check_out: str, proxy_url: str = "", client: Client = None, fetch_workers: int = 16, parse_workers: int = None, max_pending: int = 64, fields: list = None, compact: bool = False):
+    # room pages are downloaded by fetch_workers threads, parsed and standardized by parse_workers processes
+    # (raw bytes in, standardized dicts out) and priced back on the threads, at most max_pending rooms are in flight,
+    # yields (room_id, data, error) as rooms complete, with compact data is a CompactDetails and the price is in data.extra,
+    # the workers are started with forkserver (spawn where it is not available) so scripts need an `if __name__ == "__main__":` guard
+    with_price = not (check_in is None or check_in == "" or check_out is None or check_out == "")
+    section_ids = section_ids_for(fields)
+    room_ids = iter(room_ids)
+    pending = {}
+    cpu_pool = ProcessPoolExecutor(max_workers=parse_workers or os.cpu_count(), mp_context=worker_context(), initializer=start_worker, initargs=(bool(hooks),))
+    with ThreadPoolExecutor(max_workers=fetch_workers) as io_pool, cpu_pool:
+        def fill():
+            while len(pending) < max_pending:
+                room_id = next(room_ids, None)
+                if room_id is None:
+                    return
+                pending[io_pool.submit(fetch, room_id, proxy_url, client)] = ("fetch", room_id, None)
+
+        try:
+            fill()
+            while len(pending) > 0:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, room_id, context = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        yield room_id, None, e
+                        continue
+                    match stage:
+                        case "fetch":
+                            body, cookies, room_proxy = result
+                            pending[cpu_pool.submit(parse_in_worker, body, fields, compact)] = ("parse", room_id, (cookies, room_proxy))
+                        case "parse":
+                            parsed, events, error = result
+                            for event in events:
+                                emit(event)
+                            if error is not None:
+                                yield room_id, None, error
+                                continue
+                            data, price_input = parsed
+                            api.seed(price_input["api_key"])
+                            if not with_price:
+                                yield room_id, data, None
+                                continue
+                            cookies, room_proxy = context
+                            price_future = io_pool.submit(get_price, price_input["product_id"], price_input["impression_id"], price_input["api_key"], currency, cookies, check_in, check_out, room_proxy, client, section_ids=section_ids)
+                            pending[price_future] = ("price", room_id, data)
+                        case "price":
+                            if compact:
+                                context.extra["price"] = result
+                            else:
+                                context["price"] = result
+                            yield room_id, context, None
+                fill()
+        finally:
+            for future in pending:
+                future.cancel()
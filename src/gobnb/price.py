@@ -1,10 +1,61 @@
 import json
-from curl_cffi import requests
+import time
+import base64
+import secrets
+import gobnb.api as api
+from gobnb.client import Client,get_client
+from gobnb.metrics import instrument,record_response
+from gobnb.decode import loads,PriceResponse
+from gobnb.standardize import check_fields
 from gobnb.utils import get_nested_value,remove_space,parse_price_symbol
 from urllib.parse import urlencode
 ep = "https://www.airbnb.com/api/v3/StaysPdpSections/80c7889b4b0027d99ffea830f6c0d4911a6e863a957cbe1044823f0fc746bf1f"
 
-def get_price(product_id: str, impresion_id: str,api_key: str, currency: str, cookies: list, checkIn: str, checkOut: str, proxy_url: str) -> (str):
+default_section_ids = ["BOOK_IT_FLOATING_FOOTER","POLICIES_DEFAULT","EDUCATION_FOOTER_BANNER_MODAL",
+        "BOOK_IT_SIDEBAR","URGENCY_COMMITMENT_SIDEBAR","BOOK_IT_NAV","MESSAGE_BANNER","HIGHLIGHTS_DEFAULT",
+        "EDUCATION_FOOTER_BANNER","URGENCY_COMMITMENT","BOOK_IT_CALENDAR_SHEET","CANCELLATION_POLICY_PICKER_MODAL"]
+#parse_price only reads this section
+price_section_ids = ["BOOK_IT_SIDEBAR"]
+
+#status codes airbnb answers when the generated product or impression id is not accepted
+rejected_price_status = (400, 401, 403)
+#room_id -> impression id that got a price, reused by the price only requests
+impression_ids = {}
+
+def product_id_for(room_id: int) -> str:
+    return base64.b64encode(f"StayListing:{room_id}".encode()).decode()
+
+def new_impression_id() -> str:
+    return f"p3_{int(time.time())}_{secrets.token_urlsafe(12)}"
+
+def impression_id_for(room_id: int) -> str:
+    return impression_ids.get(str(room_id)) or new_impression_id()
+
+def is_rejected(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in rejected_price_status
+
+def section_ids_for(fields: list):
+    if fields is None:
+        return default_section_ids
+    check_fields(fields)
+    return price_section_ids
+
+@instrument("get_price")
+def get_price(product_id: str, impresion_id: str,api_key: str, currency: str, cookies: list, checkIn: str, checkOut: str, proxy_url: str, client: Client = None, adults: int = 1, section_ids: list = None) -> (str):
+        url, headers = build_request(product_id, impresion_id, api_key, currency, checkIn, checkOut, adults, section_ids)
+        response = get_client(client).get(url, proxy_url, headers=headers, cookies=dict(cookies))
+        record_response(response)
+        if response.status_code in api.rejected_status:
+            api.invalidate(api_key)
+        response.raise_for_status()
+
+        data = loads(response.content, PriceResponse)
+        return parse_price(data)
+
+def build_request(product_id: str, impresion_id: str, api_key: str, currency: str, checkIn: str, checkOut: str, adults: int = 1, section_ids: list = None):
+        if section_ids is None:
+            section_ids = default_section_ids
         headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
@@ -21,7 +72,7 @@ def get_price(product_id: str, impresion_id: str,api_key: str, currency: str, co
         variablesData={
             "id": product_id,
             "pdpSectionsRequest": {
-                "adults": "1",
+                "adults": str(adults),
                 "bypassTargetings":              False,
                 "categoryTag":                   None,
                 "causeId":                       None,
@@ -51,9 +102,7 @@ def get_price(product_id: str, impresion_id: str,api_key: str, currency: str, co
                 "staysBookingMigrationEnabled":  False,
                 "translateUgc":                  None,
                 "useNewSectionWrapperApi":       False,
-                "sectionIds": ["BOOK_IT_FLOATING_FOOTER","POLICIES_DEFAULT","EDUCATION_FOOTER_BANNER_MODAL",
-                        "BOOK_IT_SIDEBAR","URGENCY_COMMITMENT_SIDEBAR","BOOK_IT_NAV","MESSAGE_BANNER","HIGHLIGHTS_DEFAULT",
-                        "EDUCATION_FOOTER_BANNER","URGENCY_COMMITMENT","BOOK_IT_CALENDAR_SHEET","CANCELLATION_POLICY_PICKER_MODAL"],
+                "sectionIds": section_ids,
                 "checkIn":        checkIn,
                 "checkOut":       checkOut,
                 "p3ImpressionId": impresion_id,
@@ -68,20 +117,9 @@ def get_price(product_id: str, impresion_id: str,api_key: str, currency: str, co
             "extensions": dataRawExtension,
         }
         url = f"{ep}?{urlencode(query)}"
-        
-        session = requests.Session()
-        proxies = {}
-        if proxy_url:
-            proxies = {"http": proxy_url, "https": proxy_url}
-
-        for name in cookies:
-            session.cookies.set(name, cookies[name])
-
-        response = session.get(url, headers=headers, proxies=proxies)
-        response.raise_for_status()
-
-        data = response.json()
+        return url, headers
 
+def parse_price(data: dict):
         sections = get_nested_value(data,"data.presentation.stayProductDetailPage.sections.sections",{})
         for section in sections:
             if section['sectionId'] == "BOOK_IT_SIDEBAR":
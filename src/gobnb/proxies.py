@@ -0,0 +1,192 @@
+import time
+import asyncio
+import threading
+
+class ProxyState:
+    def __init__(self, proxy_url: str):
+        self.proxy_url = proxy_url
+        self.in_flight = 0
+        self.latency = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def score(self) -> float:
+        return self.latency * (1 + self.consecutive_errors)
+
+class AsyncWaiters:
+    # futures of the coroutines waiting for a slot, on any event loop, woken by a release from any thread
+    def __init__(self):
+        self._futures = []
+
+    def add(self) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures.append((loop, future))
+        return future
+
+    def remove(self, future: asyncio.Future):
+        self._futures = [waiter for waiter in self._futures if waiter[1] is not future]
+
+    def wake_all(self):
+        futures, self._futures = self._futures, []
+        for loop, future in futures:
+            try:
+                loop.call_soon_threadsafe(wake, future)
+            except RuntimeError:
+                # its loop was closed
+                pass
+
+def wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+async def wait_woken(future: asyncio.Future, timeout: float = None) -> bool:
+    # False when the timeout expired first
+    try:
+        await asyncio.wait_for(future, timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+class ProxyPool:
+    # can be passed anywhere a proxy_url is accepted, every request takes a slot from one proxy:
+    # "round_robin" rotates over the healthy proxies, "least_latency" picks the lowest latency
+    # (weighted by recent errors), proxies failing max_errors times in a row are ejected for
+    # eject_seconds, doubling on every new ejection, and re-admitted afterwards
+    def __init__(self, proxy_urls: list, strategy: str = "round_robin", max_concurrency: int = 4, max_errors: int = 3, eject_seconds: float = 30, max_eject_seconds: float = 600, latency_weight: float = 0.3):
+        if len(proxy_urls) == 0:
+            raise ValueError("ProxyPool needs at least one proxy url")
+        if strategy not in ("round_robin", "least_latency"):
+            raise ValueError(f"unknown proxy strategy: {strategy}")
+        self.strategy = strategy
+        self.max_concurrency = max_concurrency
+        self.max_errors = max_errors
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.latency_weight = latency_weight
+        self.proxies = {proxy_url: ProxyState(proxy_url) for proxy_url in proxy_urls}
+        self._order = list(self.proxies)
+        self._next = 0
+        self._condition = threading.Condition()
+        self._waiters = AsyncWaiters()
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    def _pick(self, prefer: str = ""):
+        # a healthy preferred proxy is waited for when it is full, another one is only used once it is ejected
+        now = time.monotonic()
+        if prefer:
+            state = self.proxies.get(prefer)
+            if state is not None and state.ejected_until <= now:
+                return state if state.in_flight < self.max_concurrency else None
+        free = [state for state in self.proxies.values() if state.in_flight < self.max_concurrency]
+        if len(free) == 0:
+            return None
+        healthy = [state for state in free if state.ejected_until <= now]
+        if len(healthy) == 0:
+            return min(free, key=lambda state: state.ejected_until)
+        if self.strategy == "least_latency":
+            return min(healthy, key=lambda state: (state.score(), state.in_flight))
+        for _ in range(len(self._order)):
+            state = self.proxies[self._order[self._next % len(self._order)]]
+            self._next += 1
+            if state in healthy:
+                return state
+        return healthy[0]
+
+    def try_acquire(self, prefer: str = "") -> str:
+        with self._condition:
+            state = self._pick(prefer)
+            if state is None:
+                return ""
+            state.in_flight += 1
+            return state.proxy_url
+
+    def acquire(self, prefer: str = "", timeout: float = None) -> str:
+        with self._condition:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                state = self._pick(prefer)
+                if state is not None:
+                    state.in_flight += 1
+                    return state.proxy_url
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("no proxy available in the pool")
+                self._condition.wait(remaining)
+
+    async def async_acquire(self, prefer: str = "", timeout: float = None) -> str:
+        # waits for a release instead of polling
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                state = self._pick(prefer)
+                if state is not None:
+                    state.in_flight += 1
+                    return state.proxy_url
+                future = self._waiters.add()
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is None:
+                await future
+            elif remaining <= 0 or not await wait_woken(future, remaining):
+                with self._condition:
+                    self._waiters.remove(future)
+                raise TimeoutError("no proxy available in the pool")
+
+    def release(self, proxy_url: str, latency: float = None, error: bool = False):
+        with self._condition:
+            state = self.proxies[proxy_url]
+            state.in_flight -= 1
+            state.requests += 1
+            if latency is not None:
+                if state.latency == 0:
+                    state.latency = latency
+                else:
+                    state.latency = self.latency_weight * latency + (1 - self.latency_weight) * state.latency
+            if error:
+                state.errors += 1
+                state.consecutive_errors += 1
+                if state.consecutive_errors >= self.max_errors:
+                    state.ejections += 1
+                    state.consecutive_errors = 0
+                    eject_for = min(self.eject_seconds * 2 ** (state.ejections - 1), self.max_eject_seconds)
+                    state.ejected_until = time.monotonic() + eject_for
+            else:
+                state.consecutive_errors = 0
+                state.ejections = 0
+            self._condition.notify_all()
+            self._waiters.wake_all()
+
+    def stats(self) -> list:
+        now = time.monotonic()
+        with self._condition:
+            return [{
+                "proxy_url": state.proxy_url,
+                "in_flight": state.in_flight,
+                "latency": state.latency,
+                "requests": state.requests,
+                "errors": state.errors,
+                "ejected": state.ejected_until > now,
+            } for state in self.proxies.values()]
+
+class StickyProxy:
+    # keeps the follow up requests of a room (the price call using the room page cookies) on the same proxy,
+    # waiting for a free slot on it, they only move to another proxy when this one has been ejected
+    def __init__(self, pool: ProxyPool, proxy_url: str):
+        self.pool = pool
+        self.proxy_url = proxy_url
+
+def sticky(proxy_url, response):
+    if not isinstance(proxy_url, ProxyPool):
+        return proxy_url
+    used = getattr(response, "proxy_url", "")
+    if not used:
+        return proxy_url
+    return StickyProxy(proxy_url, used)
+
+def is_error_status(status_code: int) -> bool:
+    return status_code in (403, 407, 429) or status_code >= 500
@@ -0,0 +1,123 @@
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from gobnb.proxies import AsyncWaiters
+
+retry_status = (429, 500, 502, 503, 504)
+
+class RateController:
+    # token bucket (requests per second) plus an AIMD concurrency limit: a success below latency_threshold grows
+    # whichever of them is saturated (the limit by about one per round trip, the rate by rate_step), a 429/5xx,
+    # a network error or a slow response multiplies both by decrease_factor, throttled responses are retried up to max_retries times honoring Retry-After, otherwise with exponential backoff and jitter
+    def __init__(self, rate: float = 5, burst: int = 10, concurrency: int = 4, min_concurrency: int = 1, max_concurrency: int = 64,
+                 min_rate: float = 0.2, max_rate: float = 100, rate_step: float = 0.2, decrease_factor: float = 0.5,
+                 latency_threshold: float = 10, max_retries: int = 3, backoff: float = 1, max_backoff: float = 60):
+        self.rate = rate
+        self.burst = burst
+        self.limit = float(concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_step = rate_step
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.in_flight = 0
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._waiters = AsyncWaiters()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _try_acquire(self) -> float:
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.in_flight >= int(self.limit):
+            return -1
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        self.in_flight += 1
+        return 0
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                wait = self._try_acquire()
+                if wait == 0:
+                    return
+                self._condition.wait(None if wait < 0 else wait)
+
+    async def async_acquire(self):
+        # sleeps for the refill (or pause) time, waits for a release when the concurrency limit is reached
+        while True:
+            with self._condition:
+                wait = self._try_acquire()
+                if wait == 0:
+                    return
+                future = self._waiters.add() if wait < 0 else None
+            if future is None:
+                await asyncio.sleep(wait)
+            else:
+                await future
+
+    def release(self, latency: float = None, status_code: int = 0, error: bool = False, retry_after: float = None):
+        with self._condition:
+            limited = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            now = time.monotonic()
+            if error or status_code in retry_status or (latency is not None and latency > self.latency_threshold):
+                # one decrease per round trip: a 429, error or slow response of a request sent before the last
+                # decrease only counts once, latency (time since the request was sent) is needed for errors too
+                if now - (latency or 0) > self.last_decrease:
+                    self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+                    self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                    self.last_decrease = now
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+            else:
+                # only grow what is actually holding requests back
+                if limited:
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                if self.tokens < 1:
+                    self.rate = min(self.max_rate, self.rate + self.rate_step)
+            self._condition.notify_all()
+            self._waiters.wake_all()
+
+    def retry_delay(self, attempt: int, retry_after: float = None) -> float:
+        if retry_after:
+            return min(retry_after, self.max_backoff)
+        delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {"rate": self.rate, "concurrency": int(self.limit), "in_flight": self.in_flight}
+
+def parse_retry_after(response) -> float:
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
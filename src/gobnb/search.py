@@ -1,8 +1,12 @@
 import gobnb.api as api
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from urllib.parse import urlencode
 from gobnb.standardize import get_nested_value,standardize_search
-from curl_cffi import requests
+from gobnb.client import Client,get_client
+from gobnb.columnar import SearchColumns
+from gobnb.metrics import instrument,record_response
+from gobnb.decode import loads,SearchResponse
 
 treament = [
 	"feed_map_decouple_m11_treatment",
@@ -12,26 +16,156 @@ treament = [
 	"selective_query_feed_map_homepage_moweb_treatment",
 ]
 
-def Search_all(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, currency:str, proxy_url:str):
-    api_key = api.get(proxy_url)
-    all_results = []
-    cursor = ""
-    while True:
-        results_raw = search(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,cursor, currency, api_key, proxy_url)
+def Search_all(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, currency:str, proxy_url:str, client:Client=None):
+    return list(Search_iter(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,currency,proxy_url,client))
+
+def Search_all_columns(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, currency:str, proxy_url:str, client:Client=None):
+    return SearchColumns.from_listings(Search_iter(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,currency,proxy_url,client))
+
+def Search_iter(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, currency:str, proxy_url:str, client:Client=None):
+    for _, results, _ in search_pages(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,currency,proxy_url,client):
+        yield from results
+
+def search_pages(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, currency:str, proxy_url:str, client:Client=None, cursor:str=""):
+    # yields (cursor, results, next cursor) for every page starting at cursor, the next cursor of the last page is None
+    while cursor is not None:
+        api_key = api.get_cached(proxy_url, client)
+        results_raw = search(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,cursor, currency, api_key, proxy_url, client)
         results = standardize_search(results_raw.get("searchResults",[]))
-        all_results = all_results + results
-        if len(results)==0 or "nextPageCursor" not in results_raw["paginationInfo"] or  results_raw["paginationInfo"]["nextPageCursor"] is None:
-            break
-        cursor = results_raw["paginationInfo"]["nextPageCursor"]
-    return all_results
-
-def Search_first_page(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, cursor:str, currency:str, proxy_url:str):
-    api_key = api.get(proxy_url)
-    results = search(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,"", currency, api_key, proxy_url)
+        next_page = next_cursor(results_raw, results)
+        yield cursor, results, next_page
+        cursor = next_page
+
+def next_cursor(results_raw:dict, results:list):
+    if len(results)==0:
+        return None
+    return get_nested_value(results_raw,"paginationInfo.nextPageCursor")
+
+def Search_all_tiled(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, currency:str, proxy_url:str, client:Client=None, tile_limit:int=250, max_depth:int=6, concurrency:int=4):
+    # a tile is split in four as soon as its first page shows it is full (page count times page size), without following
+    # its cursors, returns {"listings": [...], "errors": {(ne_lat, ne_long, sw_lat, sw_long): error}} like Search_batch
+    def run(tile):
+        t_ne_lat, t_ne_long, t_sw_lat, t_sw_long, t_zoom, depth = tile
+        try:
+            results, full = search_tile(check_in,check_out,t_ne_lat,t_ne_long,t_sw_lat,t_sw_long,t_zoom,currency,proxy_url,client,tile_limit,depth<max_depth)
+            return tile, results, full, ""
+        except Exception as e:
+            return tile, [], False, str(e)
+
+    all_results = {}
+    errors = {}
+    tiles = [(ne_lat, ne_long, sw_lat, sw_long, zoom_value, 0)]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while len(tiles)>0:
+            next_tiles = []
+            for tile, results, full, error in executor.map(run, tiles):
+                if error:
+                    errors[tile[:4]] = error
+                    continue
+                for result in results:
+                    all_results.setdefault(result["room_id"], result)
+                if full and tile[5]<max_depth:
+                    next_tiles.extend(split_tile(tile))
+            tiles = next_tiles
+    return {"listings": list(all_results.values()), "errors": errors}
+
+def search_tile(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, currency:str, proxy_url:str, client:Client=None, tile_limit:int=250, can_split:bool=True):
+    # (results, full), when the tile can be split and its first page already shows tile_limit listings only that page is fetched
+    api_key = api.get_cached(proxy_url, client)
+    results_raw = search(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,"", currency, api_key, proxy_url, client)
+    results = standardize_search(results_raw.get("searchResults",[]))
+    cursor = next_cursor(results_raw, results)
+    if cursor is None:
+        return results, len(results)>=tile_limit
+    pages = len(get_nested_value(results_raw,"paginationInfo.pageCursors",[]) or [])
+    if can_split and pages*len(results)>=tile_limit:
+        return results, True
+    for _, page, _ in search_pages(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,currency,proxy_url,client,cursor):
+        results.extend(page)
+    return results, len(results)>=tile_limit
+
+def Search_batch(queries:list, proxy_url:str, client:Client=None, concurrency:int=4):
+    # every query is a dict with check_in, check_out, ne_lat, ne_long, sw_lat, sw_long, zoom_value, currency and optionally
+    # filters, the cursor chains run on concurrency threads sharing the api key and the client, a listing found by
+    # several queries is returned once with the indexes of those queries and the price each of them got
+    def run(index):
+        try:
+            return index, search_chain(queries[index], proxy_url, client), ""
+        except Exception as e:
+            return index, [], str(e)
+
+    all_results = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index, results, error in executor.map(run, range(len(queries))):
+            if error:
+                errors[index] = error
+                continue
+            for result in results:
+                merged = all_results.get(result["room_id"])
+                if merged is None:
+                    merged = dict(result, queries=[], prices={})
+                    all_results[result["room_id"]] = merged
+                if index not in merged["prices"]:
+                    merged["queries"].append(index)
+                    merged["prices"][index] = result["price"]
+    return {"listings": list(all_results.values()), "errors": errors}
+
+def search_chain(query:dict, proxy_url:str, client:Client=None):
+    # the request is built once, only the cursor changes between pages
+    api_key = api.get_cached(proxy_url, client)
+    url_parsed, inputData, headers = build_request(query["check_in"],query["check_out"],query["ne_lat"],query["ne_long"],query["sw_lat"],query["sw_long"],query["zoom_value"],"",query["currency"],api_key,query.get("filters"))
+    results = []
+    cursor = ""
+    while cursor is not None:
+        set_cursor(inputData, cursor)
+        headers["X-Airbnb-Api-Key"] = api.get_cached(proxy_url, client)
+        results_raw = send_search(url_parsed, inputData, headers, proxy_url, client)
+        page = standardize_search(results_raw.get("searchResults",[]))
+        results.extend(page)
+        cursor = next_cursor(results_raw, page)
+    return results
+
+def set_cursor(inputData:dict, cursor:str):
+    inputData["variables"]["staysMapSearchRequestV2"]["cursor"] = cursor
+    inputData["variables"]["staysSearchRequest"]["cursor"] = cursor
+
+def split_tile(tile:tuple):
+    ne_lat, ne_long, sw_lat, sw_long, zoom_value, depth = tile
+    mid_lat = (ne_lat + sw_lat) / 2
+    mid_long = (ne_long + sw_long) / 2
+    return [
+        (ne_lat, ne_long, mid_lat, mid_long, zoom_value+1, depth+1),
+        (ne_lat, mid_long, mid_lat, sw_long, zoom_value+1, depth+1),
+        (mid_lat, ne_long, sw_lat, mid_long, zoom_value+1, depth+1),
+        (mid_lat, mid_long, sw_lat, sw_long, zoom_value+1, depth+1),
+    ]
+
+def Search_first_page(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, cursor:str, currency:str, proxy_url:str, client:Client=None):
+    api_key = api.get_cached(proxy_url, client)
+    results = search(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,"", currency, api_key, proxy_url, client)
     results = standardize_search(results)
     return results
 
-def search(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, cursor:str, currency:str, api_key:str, proxy_url:str):
+def search(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, cursor:str, currency:str, api_key:str, proxy_url:str, client:Client=None, filters:dict=None):
+    url_parsed, inputData, headers = build_request(check_in,check_out,ne_lat,ne_long,sw_lat,sw_long,zoom_value,cursor,currency,api_key,filters)
+    return send_search(url_parsed, inputData, headers, proxy_url, client)
+
+@instrument("search")
+def send_search(url_parsed:str, inputData:dict, headers:dict, proxy_url:str, client:Client=None):
+    api_key = headers["X-Airbnb-Api-Key"]
+    response = get_client(client).post(url_parsed, proxy_url, json = inputData, headers=headers, impersonate="chrome110")
+    if response.status_code in api.rejected_status:
+        api.invalidate(api_key)
+        headers["X-Airbnb-Api-Key"] = api.get_cached(proxy_url, client)
+        response = get_client(client).post(url_parsed, proxy_url, json = inputData, headers=headers, impersonate="chrome110")
+    record_response(response)
+    response.raise_for_status()
+    data = loads(response.content, SearchResponse)
+    to_return=get_nested_value(data,"data.presentation.staysSearch.results",{})
+    return to_return
+
+def build_request(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:float, sw_long:float, zoom_value:int, cursor:str, currency:str, api_key:str, filters:dict=None):
     check_in_date = datetime.strptime(check_in, "%Y-%m-%d")
     check_out_date = datetime.strptime(check_out, "%Y-%m-%d")
 
@@ -71,6 +205,13 @@ def search(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:floa
         {"filterName":"version","filterValues":["1.8.3"]},
         {"filterName":"zoomLevel","filterValues":[str(zoom_value)]},
     ]
+    if filters:
+        #extra raw params, e.g. {"adults": 2, "amenities": [4, 7]}, replace the default ones with the same name
+        rawParams = [param for param in rawParams if param["filterName"] not in filters]
+        for name, values in filters.items():
+            if not isinstance(values, (list, tuple)):
+                values = [values]
+            rawParams.append({"filterName":name,"filterValues":[str(value) for value in values]})
     inputData = {
         "operationName":"StaysSearch",
         "extensions":{
@@ -107,7 +248,6 @@ def search(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:floa
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
         "Accept-Language": "en",
         "Cache-Control": "no-cache",
-        "Connection": "close",
         "Pragma": "no-cache",
         "Sec-Ch-Ua": '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
         "Sec-Ch-Ua-Mobile": "?0",
@@ -120,10 +260,4 @@ def search(check_in:str, check_out:str, ne_lat:float, ne_long:float, sw_lat:floa
         "Upgrade-Insecure-Requests": "1",
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     }
-    proxies = {}
-    if proxy_url:
-        proxies = {"http": proxy_url, "https": proxy_url}
-    response = requests.post(url_parsed, json = inputData, headers=headers, proxies=proxies,  impersonate="chrome110")
-    data = response.json()
-    to_return=get_nested_value(data,"data.presentation.staysSearch.results",{})
-    return to_return
+    return url_parsed, inputData, headers
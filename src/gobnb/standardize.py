@@ -1,23 +1,50 @@
 import re
-from gobnb.utils import get_nested_value,parse_price_symbol
+from gobnb.utils import get_nested_value,compile_path,compile_fields,parse_price_symbol
+from gobnb.metrics import instrument
 
 regex_number =  re.compile(r'\d+')
-            
+
+search_type_name = compile_path("__typename","")
+search_price_display = compile_path("pricingQuote.structuredStayDisplayPrice")
+search_listing_fields = compile_fields({
+    "category": ("roomTypeCategory",""),
+    "kind":     ("pdpUrlType",""),
+    "name":     ("name",""),
+    "title":    ("title",""),
+    "type":     ("listingObjType",""),
+})
+search_latitude = compile_path("coordinate.latitude",0)
+search_longitude = compile_path("coordinate.longitude",0)
+search_badges = compile_path("formattedBadges",())
+search_badge_type = compile_path("loggingContext.badgeType","")
+search_rating = compile_path("avgRatingLocalized","")
+search_pictures = compile_path("contextualPictures",())
+search_picture = compile_path("picture","")
+price_qualifier = compile_path("primaryLine.qualifier","")
+price_original = compile_path("primaryLine.originalPrice","")
+price_primary = compile_path("primaryLine.price","")
+price_discounted = compile_path("primaryLine.discountedPrice","")
+price_secondary = compile_path("secondaryLine.price","")
+price_details = compile_path("explanationData.priceDetails",())
+price_items = compile_path("items",())
+
+@instrument("standardize_search")
 def standardize_search(results):
     datas = []
     for result in results:
-        type_name = get_nested_value(result,"__typename","")
+        type_name = search_type_name(result)
         if type_name!="StaySearchResult":
             continue
-        lt = get_nested_value(result,"listing",{})
-        pr = get_nested_value(result,"pricingQuote.structuredStayDisplayPrice",{})
+        lt = result.get("listing") or {}
+        pr = search_price_display(result) or {}
+        fields = search_listing_fields(lt)
         data = {
             "room_id":  int(lt["id"]),
-            "category": get_nested_value(lt,"roomTypeCategory",""),
-            "kind":     get_nested_value(lt,"pdpUrlType",""),
-            "name":     get_nested_value(lt,"name",""),
-            "title":    get_nested_value(lt,"title",""),
-            "type":     get_nested_value(lt,"listingObjType",""),
+            "category": fields["category"],
+            "kind":     fields["kind"],
+            "name":     fields["name"],
+            "title":    fields["title"],
+            "type":     fields["type"],
             "long_stay_discount":{},
             "fee":{
                 "airbnb":{},
@@ -25,7 +52,7 @@ def standardize_search(results):
             },
             "price": {
                 "unit":{
-                    "qualifier":  get_nested_value(pr,"primaryLine.qualifier","") 
+                    "qualifier":  price_qualifier(pr)
                 },
                 "total":{},
                 "break_down":[],
@@ -37,35 +64,35 @@ def standardize_search(results):
             "images": [],
             "badges": [],
             "coordinates":{
-                "latitude": get_nested_value(lt,"coordinate.latitude",0),
-                "longitud": get_nested_value(lt,"coordinate.longitude",0),
+                "latitude": search_latitude(lt),
+                "longitud": search_longitude(lt),
             },
         }
-        for badge in get_nested_value(lt,"formattedBadges",[]):
-            data["badges"].append(get_nested_value(badge,"loggingContext.badgeType",""))
+        for badge in search_badges(lt):
+            data["badges"].append(search_badge_type(badge))
 
-        avgRatingLocalized = get_nested_value(lt,"avgRatingLocalized","")
+        avgRatingLocalized = search_rating(lt)
         splited = avgRatingLocalized.split(" ")
         if len(splited)==2:
             rating = float(splited[0])
             data["rating"]["value"]=rating
             reviewCount = regex_number.search(splited[1]).group()
             data["rating"]["reviewCount"]=reviewCount
-        price_to_use = get_nested_value(pr,"primaryLine.originalPrice","")
+        price_to_use = price_original(pr)
         if price_to_use=="":
-              price_to_use = get_nested_value(pr,"primaryLine.price","")
+              price_to_use = price_primary(pr)
 
-        if price_to_use!="": 
+        if price_to_use!="":
             amount, currency = parse_price_symbol(price_to_use)
             data["price"]["unit"]["curency_symbol"]=currency
-            data["price"]["unit"]["amount"]=amount   
+            data["price"]["unit"]["amount"]=amount
 
-        discountedPrice=get_nested_value(pr,"primaryLine.discountedPrice","")
+        discountedPrice=price_discounted(pr)
         if discountedPrice!="":
             amount, _ = parse_price_symbol(discountedPrice)
             data["price"]["unit"]["discount"]=amount
 
-        splited = get_nested_value(pr,"secondaryLine.price","").split(" ")
+        splited = price_secondary(pr).split(" ")
         price_to_use=""
         match len(splited):
             case 2:
@@ -80,13 +107,13 @@ def standardize_search(results):
         amount, currency = parse_price_symbol(price_to_use)
         data["price"]["total"]["currency_symbol"]=currency
         data["price"]["total"]["amount"]=amount
-        for image_data in get_nested_value(lt,"contextualPictures",[]):
-            img={"url": get_nested_value(image_data,"picture","")}
-            data["images"].append(img)   
-        for price_detail in get_nested_value(pr,"explanationData.priceDetails",[]):
+        for image_data in search_pictures(lt):
+            img={"url": search_picture(image_data)}
+            data["images"].append(img)
+        for price_detail in price_details(pr):
             if "items" not in price_detail:
                 continue
-            for item in get_nested_value(price_detail,"items",[]): 
+            for item in price_items(price_detail):
                 amount, currency = parse_price_symbol(item["priceString"])
                 data["price"]["break_down"].append({"description":item["description"],"amount":amount,"currency":currency})
                 match item["displayComponentType"]:
@@ -106,38 +133,106 @@ def standardize_search(results):
         datas.append(data)
 
     return datas
-        
 
-def standardize_details(meta):
+details_event_fields = compile_fields({
+    "latitude":           ("listingLat",0),
+    "longitude":          ("listingLng",0),
+    "room_type":          ("roomType",""),
+    "is_super_host":      ("isSuperhost",""),
+    "home_tier":          ("homeTier",""),
+    "person_capacity":    ("personCapacity",0),
+})
+details_rating_fields = compile_fields({
+    "accuracy":           ("accuracyRating",0),
+    "checking":           ("checkinRating",0),
+    "cleanliness":        ("cleanlinessRating",0),
+    "communication":      ("communicationRating",0),
+    "location":           ("locationRating",0),
+    "value":              ("valueRating",0),
+    "guest_satisfaction": ("guestSatisfactionOverall",0),
+    "review_count":       ("visibleReviewCount",0),
+})
+details_sbui_sections = compile_path("data.presentation.stayProductDetailPage.sections.sbuiData.sectionConfiguration.root.sections",())
+details_sections = compile_path("data.presentation.stayProductDetailPage.sections.sections",())
+sbui_type_name = compile_path("sectionData.__typename","")
+sbui_host_id = compile_path("sectionData.hostAvatar.loggingEventData.eventData.pdpContext.hostId","")
+sbui_title = compile_path("sectionData.title","")
+sbui_overview_items = compile_path("sectionData.overviewItems",())
+item_title = compile_path("title","")
+section_type_name = compile_path("section.__typename","")
+section_host_id = compile_path("section.hostAvatar.userID","")
+section_title = compile_path("section.title","")
+section_subtitle = compile_path("section.subtitle","")
+section_host_description = compile_path("section.hostProfileDescription.htmlText","")
+section_additional_hosts = compile_path("section.additionalHosts",())
+section_media_items = compile_path("section.mediaItems",())
+section_house_rules = compile_path("section.houseRulesSections",())
+section_location_details = compile_path("section.seeAllLocationDetails",())
+section_highlights = compile_path("section.highlights",())
+section_description = compile_path("section.htmlDescription.htmlText","")
+section_amenity_groups = compile_path("section.seeAllAmenitiesGroups",())
+html_text = compile_path("html.htmlText","")
+content_html_text = compile_path("content.htmlText")
+
+#fields that can be selected in standardize_details, coordinates, room type and ratings are always included
+detail_fields = ("host","co_hosts","sub_description","images","house_rules","location_descriptions","title","highlights","description","amenities")
+sbui_section_fields = {
+    "PdpHostOverviewDefaultSection": "host",
+    "PdpOverviewV2Section":          "sub_description",
+}
+section_fields = {
+    "HostProfileSection":    "host",
+    "PhotoTourModalSection": "images",
+    "PoliciesSection":       "house_rules",
+    "LocationSection":       "location_descriptions",
+    "PdpTitleSection":       "title",
+    "PdpHighlightsSection":  "highlights",
+    "PdpDescriptionSection": "description",
+    "AmenitiesSection":      "amenities",
+}
+
+def check_fields(fields):
+    # a misspelled field would silently return empty sections and cut the price request down
+    if fields is None:
+        return
+    unknown = [field for field in fields if field not in detail_fields]
+    if unknown:
+        raise ValueError(f"unknown detail fields: {', '.join(map(str, unknown))}, expected some of: {', '.join(detail_fields)}")
+
+def wanted_sections(section_map: dict, fields) -> set:
+    if fields is None:
+        return set(section_map)
+    check_fields(fields)
+    fields = set(fields)
+    if "co_hosts" in fields:
+        fields.add("host")
+    return {type_name for type_name, field in section_map.items() if field in fields}
+
+@instrument("standardize_details")
+def standardize_details(meta, fields=None):
+    sbui_wanted = wanted_sections(sbui_section_fields, fields)
+    sections_wanted = wanted_sections(section_fields, fields)
     ev = meta["data"]["presentation"]["stayProductDetailPage"]["sections"]["metadata"]["loggingContext"]["eventDataLogging"]
+    event = details_event_fields(ev)
     data = {
         "coordinates": {
-                "latitude":         get_nested_value(ev,"listingLat",0),
-                "longitude":        get_nested_value(ev,"listingLng",0),
-        },
-        "room_type":                get_nested_value(ev,"roomType",""),
-        "is_super_host":            get_nested_value(ev,"isSuperhost",""),
-        "home_tier":                get_nested_value(ev,"homeTier",""),
-        "person_capacity":          get_nested_value(ev,"personCapacity",0),
-        "rating":{
-            "accuracy":             get_nested_value(ev,"accuracyRating",0),
-            "checking":             get_nested_value(ev,"checkinRating",0),
-            "cleanliness":          get_nested_value(ev,"cleanlinessRating",0),
-            "communication":        get_nested_value(ev,"communicationRating",0),
-            "location":             get_nested_value(ev,"locationRating",0),
-            "value":                get_nested_value(ev,"valueRating",0),
-            "guest_satisfaction":   get_nested_value(ev,"guestSatisfactionOverall",0),
-            "review_count":         get_nested_value(ev,"visibleReviewCount",0),
+                "latitude":         event["latitude"],
+                "longitude":        event["longitude"],
         },
+        "room_type":                event["room_type"],
+        "is_super_host":            event["is_super_host"],
+        "home_tier":                event["home_tier"],
+        "person_capacity":          event["person_capacity"],
+        "rating":                   details_rating_fields(ev),
         "house_rules":{
             "aditional":"",
             "general": [],
         },
         "host":{
-                "id":"",   
-                "name":"",  
-                "joined_on":"",  
-                "description":"",  
+                "id":"",
+                "name":"",
+                "joined_on":"",
+                "description":"",
         },
         "sub_description":{
             "title":"",
@@ -150,60 +245,63 @@ def standardize_details(meta):
         "highlights":[],
     }
 
-    sd = get_nested_value(meta,"data.presentation.stayProductDetailPage.sections.sbuiData")
-    for section in get_nested_value(sd,"sectionConfiguration.root.sections",[]):
-        typeName=get_nested_value(section,"sectionData.__typename","")
+    for section in details_sbui_sections(meta) if sbui_wanted else ():
+        typeName=sbui_type_name(section)
+        if typeName not in sbui_wanted:
+            continue
         if typeName == "PdpHostOverviewDefaultSection":
             data["host"]={
-                "id" :  get_nested_value(section,"sectionData.hostAvatar.loggingEventData.eventData.pdpContext.hostId",""),
-                "name": get_nested_value(section,"sectionData.title",""),
+                "id" :  sbui_host_id(section),
+                "name": sbui_title(section),
             }
         elif typeName == "PdpOverviewV2Section":
-            data["sub_description"]["title"]=get_nested_value(section,"sectionData.title","")
-            for item in get_nested_value(section,"sectionData.overviewItems",[]):
-                data["sub_description"]["items"].append(get_nested_value(item,"title",""))
+            data["sub_description"]["title"]=sbui_title(section)
+            for item in sbui_overview_items(section):
+                data["sub_description"]["items"].append(item_title(item))
 
-    for section in get_nested_value(meta,"data.presentation.stayProductDetailPage.sections.sections",[]):
-        typeName=get_nested_value(section,"section.__typename","")
+    for section in details_sections(meta) if sections_wanted else ():
+        typeName=section_type_name(section)
+        if typeName not in sections_wanted:
+            continue
         match typeName:
-            case "HostProfileSection": 
-                data["host"]["id"] = get_nested_value(section,"section.hostAvatar.userID","")
-                data["host"]["name"] = get_nested_value(section,"section.title","")
-                data["host"]["joined_on"] = get_nested_value(section,"section.subtitle","")
-                data["host"]["description"] = get_nested_value(section,"section.hostProfileDescription.htmlText","")
-                for cohost in get_nested_value(section,"section.additionalHosts",[]):
+            case "HostProfileSection":
+                data["host"]["id"] = section_host_id(section)
+                data["host"]["name"] = section_title(section)
+                data["host"]["joined_on"] = section_subtitle(section)
+                data["host"]["description"] = section_host_description(section)
+                for cohost in section_additional_hosts(section):
                     data["co_hosts"].append({"id":cohost.get("id",""),"name":cohost.get("name","")})
-            case "PhotoTourModalSection":  
-                for mediaItem in get_nested_value(section,"section.mediaItems",[]):
+            case "PhotoTourModalSection":
+                for mediaItem in section_media_items(section):
                     img={
                         "title": mediaItem.get("accessibilityLabel",""),
                         "url": mediaItem.get("baseUrl",""),
                     }
                     data["images"].append(img)
-            case "PoliciesSection":        
-                for houseRulesSection in get_nested_value(section,"section.houseRulesSections",[]):
+            case "PoliciesSection":
+                for houseRulesSection in section_house_rules(section):
                     house_rule={
                         "title": houseRulesSection.get("title",""),
                         "values":[],
                     }
                     for item in houseRulesSection.get("items",[]):
                             if item.get("title","")=="Additional rules":
-                                data["house_rules"]["aditional"]=get_nested_value(item,"html.htmlText","")
+                                data["house_rules"]["aditional"]=html_text(item)
                                 continue
                             house_rule["values"].append({"title":item.get("title","") ,"icon": item.get("icon","")})
 
                     data["house_rules"]["general"].append(house_rule)
             case "LocationSection":
-                for locationDetail in get_nested_value(section,"section.seeAllLocationDetails",[]):
+                for locationDetail in section_location_details(section):
                     seeAllLocationDetail={
                         "title": locationDetail.get("title",""),
-                        "content": get_nested_value(locationDetail,"content.htmlText"),
+                        "content": content_html_text(locationDetail),
                     }
                     data["location_descriptions"].append(seeAllLocationDetail)
-            case "PdpTitleSection":           
+            case "PdpTitleSection":
                     data["title"]=section.get("title","")
             case "PdpHighlightsSection":
-                for highlitingData in get_nested_value(section,"section.highlights",[]):
+                for highlitingData in section_highlights(section):
                     highliting={
                         "title": highlitingData.get("title",""),
                         "subtitle": highlitingData.get("subtitle",""),
@@ -211,9 +309,9 @@ def standardize_details(meta):
                     }
                     data["highlights"].append(highliting)
             case "PdpDescriptionSection":
-                data["description"]=  get_nested_value(section,"section.htmlDescription.htmlText","")
-            case "AmenitiesSection":  
-                for amenityGroupRaw in get_nested_value(section,"section.seeAllAmenitiesGroups",[]):
+                data["description"]=  section_description(section)
+            case "AmenitiesSection":
+                for amenityGroupRaw in section_amenity_groups(section):
                     amenityGroup={
                         "title": amenityGroupRaw.get("title",""),
                         "values": [],
@@ -228,4 +326,3 @@ def standardize_details(meta):
                         amenityGroup["values"].append(amenity)
                     data["amenities"].append(amenityGroup)
     return data
-
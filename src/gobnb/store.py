@@ -0,0 +1,166 @@
+import json
+import time
+import sqlite3
+import threading
+from gobnb.decode import loads
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+schema = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    """CREATE TABLE IF NOT EXISTS listings (
+        room_id      INTEGER PRIMARY KEY,
+        name         TEXT,
+        title        TEXT,
+        category     TEXT,
+        kind         TEXT,
+        type         TEXT,
+        latitude     REAL,
+        longitude    REAL,
+        rating       REAL,
+        review_count INTEGER,
+        data         TEXT,
+        updated      REAL
+    )""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS listings_rtree USING rtree(room_id, min_lat, max_lat, min_long, max_long)",
+    """CREATE TABLE IF NOT EXISTS prices (
+        room_id   INTEGER NOT NULL,
+        snapshot  REAL NOT NULL,
+        check_in  TEXT,
+        check_out TEXT,
+        currency  TEXT,
+        amount    REAL,
+        discount  REAL,
+        total     REAL
+    )""",
+    "CREATE INDEX IF NOT EXISTS prices_room_id ON prices(room_id, snapshot)",
+    """CREATE TABLE IF NOT EXISTS details (
+        room_id INTEGER PRIMARY KEY,
+        data    TEXT,
+        updated REAL
+    )""",
+]
+
+upsert_listing = """INSERT INTO listings (room_id, name, title, category, kind, type, latitude, longitude, rating, review_count, data, updated)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(room_id) DO UPDATE SET name=excluded.name, title=excluded.title, category=excluded.category, kind=excluded.kind,
+    type=excluded.type, latitude=excluded.latitude, longitude=excluded.longitude, rating=excluded.rating,
+    review_count=excluded.review_count, data=excluded.data, updated=excluded.updated"""
+upsert_point = "INSERT OR REPLACE INTO listings_rtree (room_id, min_lat, max_lat, min_long, max_long) VALUES (?, ?, ?, ?, ?)"
+insert_price = "INSERT INTO prices (room_id, snapshot, check_in, check_out, currency, amount, discount, total) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+upsert_details = """INSERT INTO details (room_id, data, updated) VALUES (?, ?, ?)
+ON CONFLICT(room_id) DO UPDATE SET data=excluded.data, updated=excluded.updated"""
+
+def dumps(data) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(data)
+
+class ListingStore:
+    # sqlite file with the latest version of every listing (R-tree on the coordinates), the latest details and one
+    # price row per listing and search snapshot, writes are grouped in transactions of batch_size rows
+    def __init__(self, path: str, batch_size: int = 5000):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            for statement in schema:
+                self._db.execute(statement)
+            self._db.commit()
+
+    def _write(self, statements: list):
+        # statements is a list of (sql, rows), the rows of every batch are written in one transaction
+        size = max(len(rows) for _, rows in statements)
+        with self._lock:
+            for start in range(0, size, self.batch_size):
+                with self._db:
+                    for sql, rows in statements:
+                        self._db.executemany(sql, rows[start:start+self.batch_size])
+
+    def upsert_search(self, listings: list, check_in: str = "", check_out: str = "", snapshot: float = None) -> int:
+        # listings as returned by standardize_search, the price of each one is added to its history under snapshot
+        if snapshot is None:
+            snapshot = time.time()
+        listing_rows, point_rows, price_rows = [], [], []
+        for listing in listings:
+            room_id = listing["room_id"]
+            coordinates = listing.get("coordinates", {})
+            latitude = float(coordinates.get("latitude") or 0)
+            longitude = float(coordinates.get("longitud") or 0)
+            rating = listing.get("rating", {})
+            listing_rows.append((
+                room_id, listing.get("name", ""), listing.get("title", ""), listing.get("category", ""), listing.get("kind", ""),
+                listing.get("type", ""), latitude, longitude, float(rating.get("value") or 0), int(rating.get("reviewCount") or 0),
+                dumps(listing), snapshot,
+            ))
+            point_rows.append((room_id, latitude, latitude, longitude, longitude))
+            price = listing.get("price", {})
+            unit = price.get("unit", {})
+            total = price.get("total", {})
+            price_rows.append((
+                room_id, snapshot, check_in, check_out, unit.get("curency_symbol") or total.get("currency_symbol", ""),
+                unit.get("amount"), unit.get("discount"), total.get("amount"),
+            ))
+        self._write([(upsert_listing, listing_rows), (upsert_point, point_rows), (insert_price, price_rows)])
+        return len(listing_rows)
+
+    def upsert_details(self, details: dict, snapshot: float = None) -> int:
+        # details is room_id -> data as returned by Get_from_room_id
+        if snapshot is None:
+            snapshot = time.time()
+        rows = [(int(room_id), dumps(data), snapshot) for room_id, data in details.items()]
+        self._write([(upsert_details, rows)])
+        return len(rows)
+
+    def in_box(self, ne_lat: float, ne_long: float, sw_lat: float, sw_long: float, max_price: float = None) -> list:
+        # listings inside the box, with max_price only the ones whose last seen nightly price is lower or equal
+        sql = """SELECT l.data FROM listings_rtree r
+            JOIN listings l ON l.room_id = r.room_id
+            LEFT JOIN prices p ON p.rowid = (SELECT rowid FROM prices WHERE room_id = r.room_id ORDER BY snapshot DESC LIMIT 1)
+            WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_long >= ? AND r.min_long <= ?
+            AND l.latitude BETWEEN ? AND ? AND l.longitude BETWEEN ? AND ?"""
+        #the R-tree keeps 32 bit floats, the exact coordinates are checked on the candidates
+        box = [min(ne_lat, sw_lat), max(ne_lat, sw_lat), min(ne_long, sw_long), max(ne_long, sw_long)]
+        params = box + box
+        if max_price is not None:
+            sql += " AND COALESCE(p.discount, p.amount) <= ?"
+            params.append(max_price)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [loads(row[0]) for row in rows]
+
+    def get(self, room_id: int) -> dict:
+        with self._lock:
+            row = self._db.execute("SELECT data FROM listings WHERE room_id = ?", (room_id,)).fetchone()
+        if row is None:
+            return None
+        return loads(row[0])
+
+    def get_details(self, room_id: int) -> dict:
+        with self._lock:
+            row = self._db.execute("SELECT data FROM details WHERE room_id = ?", (room_id,)).fetchone()
+        if row is None:
+            return None
+        return loads(row[0])
+
+    def price_history(self, room_id: int) -> list:
+        with self._lock:
+            rows = self._db.execute("""SELECT snapshot, check_in, check_out, currency, amount, discount, total FROM prices
+                WHERE room_id = ? ORDER BY snapshot""", (room_id,)).fetchall()
+        keys = ("snapshot", "check_in", "check_out", "currency", "amount", "discount", "total")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -8,15 +8,46 @@ regx_price = re.compile(r'\d+')
 def remove_space(value:str):
     return regex_space.sub(' ', value.strip())
 
+split_paths = {}
+
 def get_nested_value(dic, key_path, default=None):
-    keys = key_path.split(".")
+    keys = split_paths.get(key_path)
+    if keys is None:
+        keys = tuple(key_path.split("."))
+        split_paths[key_path] = keys
     current = dic
     for key in keys:
         current = current.get(key, {})
-        if current == {} or current is None:
+        if current is None or (type(current) is dict and not current):
             return default
     return current
 
+def compile_path(key_path: str, default=None):
+    keys = tuple(key_path.split("."))
+    if len(keys) == 1:
+        key = keys[0]
+        def get_value(dic):
+            current = dic.get(key)
+            if current is None or (type(current) is dict and not current):
+                return default
+            return current
+        return get_value
+
+    def get_value(dic):
+        current = dic
+        for key in keys:
+            current = current.get(key)
+            if current is None or (type(current) is dict and not current):
+                return default
+        return current
+    return get_value
+
+def compile_fields(spec: dict):
+    accessors = tuple((name, compile_path(key_path, default)) for name, (key_path, default) in spec.items())
+    def extract(dic):
+        return {name: get_value(dic) for name, get_value in accessors}
+    return extract
+
 def parse_price_symbol(price_raw: str):
     price_raw = price_raw.replace(",", "")
 
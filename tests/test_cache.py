@@ -0,0 +1,78 @@
+import os
+import pytest
+import gobnb.cache as cache
+from gobnb.cache import ResponseCache,CacheMiss
+from gobnb.price import build_request
+
+class Response:
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.url = "https://www.airbnb.com/"
+        self.status_code = status_code
+        self.headers = {"Content-Type": "text/html"}
+        self.cookies = {"bev": "1"}
+        self.content = content
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+def test_round_trip(tmp_path):
+    responses = ResponseCache(str(tmp_path))
+    key = responses.key("GET", "https://www.airbnb.com/rooms/1")
+    assert responses.get(key) is None
+    responses.put(key, Response(b"room"))
+    cached = responses.get(key)
+    assert (cached.status_code, cached.content, cached.cookies) == (200, b"room", {"bev": "1"})
+    assert ResponseCache(str(tmp_path)).get(key).content == b"room"
+
+def test_errors_are_not_stored(tmp_path):
+    responses = ResponseCache(str(tmp_path))
+    responses.put("a", Response(b"", 503))
+    assert responses.get("a") is None
+
+def test_least_recently_used_is_evicted(tmp_path, clock):
+    responses = ResponseCache(str(tmp_path))
+    for key in ("a", "b", "c"):
+        clock.now += 1
+        responses.put(key, Response(os.urandom(1000)))
+    clock.now += 1
+    responses.get("a")
+    # room for three entries
+    responses.max_bytes = responses._size + 100
+    clock.now += 1
+    responses.put("d", Response(os.urandom(1000)))
+    assert responses.get("b") is None
+    assert all(responses.get(key) is not None for key in ("a", "c", "d"))
+
+def test_ttl_only_applies_when_recording(tmp_path, clock):
+    ResponseCache(str(tmp_path)).put("a", Response(b"room"))
+    clock.now += 61
+    assert ResponseCache(str(tmp_path), ttl=60, mode="replay").get("a").content == b"room"
+    assert ResponseCache(str(tmp_path), ttl=60).get("a") is None
+    with pytest.raises(CacheMiss):
+        ResponseCache(str(tmp_path), mode="replay").get("a")
+
+def test_hit_survives_an_eviction_after_the_read(tmp_path, monkeypatch):
+    responses = ResponseCache(str(tmp_path))
+    responses.put("a", Response(b"room"))
+    def evicted(path, times):
+        raise FileNotFoundError(path)
+    monkeypatch.setattr(cache.os, "utime", evicted)
+    assert responses.get("a").content == b"room"
+
+def test_impression_id_is_not_part_of_the_key(tmp_path):
+    responses = ResponseCache(str(tmp_path))
+    first, _ = build_request("product", "impression-1", "key", "USD", "2024-11-02", "2024-11-10")
+    second, _ = build_request("product", "impression-2", "key", "USD", "2024-11-02", "2024-11-10")
+    other_dates, _ = build_request("product", "impression-1", "key", "USD", "2024-11-02", "2024-11-11")
+    assert responses.key("GET", first) == responses.key("GET", second)
+    assert responses.key("GET", first) != responses.key("GET", other_dates)
@@ -0,0 +1,61 @@
+import json
+from gobnb.cli import Journal,main
+
+job_args = ["--check-in", "2024-11-02", "--check-out", "2024-11-10", "--ne-lat", "1", "--ne-long", "1", "--sw-lat", "0", "--sw-long", "0", "--no-details"]
+job = {
+    "check_in": "2024-11-02", "check_out": "2024-11-10", "ne_lat": 1.0, "ne_long": 1.0, "sw_lat": 0.0, "sw_long": 0.0,
+    "zoom": 2, "currency": "USD", "details": False, "fields": None,
+}
+
+def write_lines(path, *lines, tail=""):
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines) + tail)
+
+def read_entries(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_cut_off_line_is_truncated_before_appending(tmp_path):
+    path = tmp_path / "journal"
+    write_lines(path, {"event": "room", "room_id": 1}, tail='{"event": "room", "ro')
+    journal = Journal(str(path))
+    assert journal.done == {1}
+    journal.append({"event": "room", "room_id": 2})
+    journal.close()
+    assert read_entries(path) == [{"event": "room", "room_id": 1}, {"event": "room", "room_id": 2}]
+    assert Journal(str(path)).done == {1, 2}
+
+def test_missing_newline_is_added(tmp_path):
+    path = tmp_path / "journal"
+    path.write_text(json.dumps({"event": "room", "room_id": 1}))
+    journal = Journal(str(path))
+    journal.append({"event": "room", "room_id": 2})
+    journal.close()
+    assert [entry["room_id"] for entry in read_entries(path)] == [1, 2]
+
+def test_pages_are_resumed_from_the_last_cursor(tmp_path):
+    path = tmp_path / "journal"
+    write_lines(path,
+        {"event": "job", "job": job},
+        {"event": "page", "cursor": "", "next": "page-1", "room_ids": [1, 2]},
+        {"event": "page", "cursor": "page-1", "next": "page-2", "room_ids": [2, 3]},
+        {"event": "room", "room_id": 1},
+    )
+    journal = Journal(str(path))
+    assert journal.job == job
+    assert journal.next_cursor == "page-2"
+    assert journal.room_ids == [1, 2, 3]
+    assert journal.done == {1}
+    assert not journal.search_done()
+    journal.close()
+
+def test_finished_job_does_not_search_again(tmp_path):
+    path = tmp_path / "journal"
+    output = tmp_path / "output.jsonl"
+    write_lines(path, {"event": "job", "job": job}, {"event": "page", "cursor": "", "next": None, "room_ids": [1]})
+    assert main(job_args + ["--journal", str(path), "--output", str(output)]) == 0
+    assert output.read_text() == ""
+
+def test_journal_of_another_job_is_refused(tmp_path):
+    path = tmp_path / "journal"
+    write_lines(path, {"event": "job", "job": dict(job, currency="EUR")})
+    assert main(job_args + ["--journal", str(path), "--output", str(tmp_path / "output.jsonl")]) == 2
+    assert len(read_entries(path)) == 1
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from curl_cffi.requests.exceptions import RequestException
+from gobnb.client import Client
+from gobnb.ratelimit import RateController,parse_retry_after
+
+def controller() -> RateController:
+    return RateController(rate=50, burst=50, concurrency=32, max_concurrency=64)
+
+def burst(rate: RateController, size: int, **release):
+    for _ in range(size):
+        rate.acquire()
+    for _ in range(size):
+        rate.release(0.05, **release)
+
+@pytest.mark.parametrize("release", [{"error": True}, {"status_code": 429}, {"status_code": 503}])
+def test_one_decrease_per_burst(release):
+    rate = controller()
+    burst(rate, 5, **release)
+    assert rate.stats() == {"rate": 25, "concurrency": 16, "in_flight": 0}
+
+def test_requests_sent_after_a_decrease_decrease_again():
+    rate = controller()
+    burst(rate, 5, error=True)
+    rate.acquire()
+    rate.release(0, error=True)
+    assert rate.stats()["concurrency"] == 8
+
+def test_client_counts_a_burst_of_network_errors_once(monkeypatch):
+    rate = RateController(rate=50, burst=50, concurrency=32, max_concurrency=64, max_retries=0)
+    client = Client(rate=rate)
+    in_flight = threading.Barrier(5)
+    def send(method, url, proxy_url, kwargs):
+        in_flight.wait(5)
+        raise RequestException("connection reset")
+    monkeypatch.setattr(client, "_send", send)
+    def request(_):
+        with pytest.raises(RequestException):
+            client.get("https://www.airbnb.com/")
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        list(executor.map(request, range(5)))
+    assert rate.stats() == {"rate": 25, "concurrency": 16, "in_flight": 0}
+
+def test_success_grows_the_saturated_limit():
+    rate = RateController(rate=100, burst=100, concurrency=2, max_concurrency=4)
+    for _ in range(2):
+        rate.acquire()
+    rate.release(0.05, 200)
+    assert rate.limit == 2.5
+
+def test_async_waiters_are_woken_by_release():
+    async def run():
+        rate = RateController(rate=1000, burst=10, concurrency=1, max_concurrency=1)
+        await rate.async_acquire()
+        waiter = asyncio.ensure_future(rate.async_acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        rate.release(0.01, 200)
+        await asyncio.wait_for(waiter, 1)
+        assert rate.stats()["in_flight"] == 1
+    asyncio.run(run())
+
+class Headers:
+    def __init__(self, retry_after: str):
+        self.headers = {"Retry-After": retry_after}
+
+def test_parse_retry_after():
+    assert parse_retry_after(Headers("3")) == 3
+    assert parse_retry_after(Headers("soon")) is None